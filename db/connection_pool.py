@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the checkout timeout."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB connections.
+
+    Keeps up to `size` idle connections and allows `max_overflow` extra ones
+    under load; callers block for up to `timeout` seconds beyond that.
+    Connections idle longer than `ping_after` seconds are pinged on checkout
+    and connections older than `recycle` seconds are replaced.
+    """
+
+    def __init__(self, connect, size=5, max_overflow=5, timeout=10, recycle=3600, ping_after=30):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+
+        self._idle = deque()  # (conn, created_at, last_used)
+        self._born = {}       # id(conn) -> created_at, for checked-out connections
+        self._statements = {} # id(conn) -> {(sql, dictionary): prepared cursor}
+        self._open = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.checkouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def acquire(self):
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("connection pool is closed")
+                if self._idle:
+                    conn, created_at, last_used = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    conn = None
+                    break
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    raise PoolTimeout(f"no connection available after {self.timeout}s")
+                self._cond.wait(remaining)
+
+        # Connecting and pinging happen outside the lock
+        try:
+            now = time.monotonic()
+            if conn is not None and (now - created_at > self.recycle
+                                     or (now - last_used > self.ping_after and not self._healthy(conn))):
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+                created_at = time.monotonic()
+                with self._cond:
+                    self.created += 1
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._born[id(conn)] = created_at
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        return conn
+
+    def release(self, conn, broken=False):
+        try:
+            if not broken and conn.in_transaction:
+                conn.rollback()  # never hand out a connection with an open snapshot
+        except Exception:
+            broken = True
+
+        with self._cond:
+            created_at = self._born.pop(id(conn), time.monotonic())
+            keep = not broken and not self._closed and len(self._idle) < self.size
+            if keep:
+                self._idle.append((conn, created_at, time.monotonic()))
+            else:
+                self._open -= 1
+            self._cond.notify()
+        if not keep:
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except Exception:
+            broken = not self._healthy(conn)
+            raise
+        finally:
+            self.release(conn, broken)
+
+    def prepared_cursor(self, conn, sql, dictionary=False):
+        """
+        Return this connection's prepared cursor for sql, creating it once.
+        The statement is prepared on first execute and reused afterwards.
+        """
+        statements = self._statements.setdefault(id(conn), {})
+        cursor = statements.get((sql, dictionary))
+        if cursor is None:
+            cursor = conn.cursor(prepared=True, dictionary=dictionary)
+            statements[(sql, dictionary)] = cursor
+        return cursor
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+                "checkouts": self.checkouts,
+                "created": self.created,
+                "discarded": self.discarded,
+                "wait_total": self.wait_total,
+                "wait_avg": self.wait_total / self.checkouts if self.checkouts else 0.0,
+                "wait_max": self.wait_max,
+            }
+
+    @staticmethod
+    def _healthy(conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        with self._cond:
+            self.discarded += 1
+            statements = self._statements.pop(id(conn), {})
+        try:
+            for cursor in statements.values():
+                cursor.close()
+            conn.close()
+        except Exception:
+            pass
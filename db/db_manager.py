@@ -1,13 +1,27 @@
 import mysql.connector
 from mysql.connector import Error
 import os
+import threading
 from dotenv import load_dotenv
+from db.connection_pool import ConnectionPool, PoolTimeout
+from db.template_cache import TemplateCache
+from db.unlock_index import UnlockCodeIndex
 
-# Initialize connection and user variables
-_connection = None
+# Initialize pool and user variables
+_pool = None
+_pool_lock = threading.Lock()
 _current_user = None
 _current_user_id = None
 
+# Errors every public function handles instead of raising
+DB_ERRORS = (Error, PoolTimeout)
+
+# Decoded biometric templates, keyed by (username, biometric_type)
+_template_cache = TemplateCache()
+
+# Keyed hashes of all unlock codes, loaded on first use
+_unlock_index = None
+
 
 def set_current_user(user, user_id):
     """Set the currently authenticated user"""
@@ -25,164 +39,388 @@ def get_current_user_id():
     """Get the current user's ID"""
     return _current_user_id
 
+# Hot read queries, shared with the EXPLAIN check in db/schema.py
+USER_ID_QUERY = "SELECT id FROM users WHERE username = %s"
+
+USERNAME_BY_UNLOCK_CODE_QUERY = """
+    SELECT u.username
+    FROM users u
+    JOIN vault_settings v ON u.id = v.user_id
+    WHERE v.unlock_code = %s
+"""
+
+AUTH_CONTEXT_QUERY = """
+    SELECT u.id, u.username, v.unlock_code, v.encrypted_aes_key,
+           b.id, b.type, MD5(b.data), b.data
+    FROM users u
+    JOIN vault_settings v ON v.user_id = u.id
+    LEFT JOIN biometric_data b
+           ON b.user_id = u.id AND (%s IS NULL OR b.type = %s)
+    WHERE {where}
+"""
+AUTH_CONTEXT_BY_USERNAME_QUERY = AUTH_CONTEXT_QUERY.format(where="u.username = %s")
+AUTH_CONTEXT_BY_UNLOCK_CODE_QUERY = AUTH_CONTEXT_QUERY.format(where="v.unlock_code = %s")
+
+BIOMETRIC_GALLERY_QUERY = """
+    SELECT b.user_id, u.username, b.data
+    FROM biometric_data b
+    JOIN users u ON u.id = b.user_id
+    WHERE b.type = %s
+"""
+
+FILES_FIRST_PAGE_QUERY = """
+    SELECT id, filename, filepath, date_added
+    FROM files
+    WHERE user_id = %s
+    ORDER BY date_added DESC, id DESC
+    LIMIT %s
+"""
+
+FILES_NEXT_PAGE_QUERY = """
+    SELECT id, filename, filepath, date_added
+    FROM files
+    WHERE user_id = %s
+      AND (date_added < %s OR (date_added = %s AND id < %s))
+    ORDER BY date_added DESC, id DESC
+    LIMIT %s
+"""
+
+
 def get_user_id(username):
     """
     Get the user ID for the given username.
     """
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
-        result = cursor.fetchone()
-        return result[0] if result else None
-    finally:
-        if cursor:
-            cursor.close()
+    rows = _query_prepared(USER_ID_QUERY, (username,))
+    return rows[0][0] if rows else None
 
 
-def get_connection():
-    """Get or create MySQL connection"""
-    global _connection
-    if not _connection or not _connection.is_connected():
-        load_dotenv()
-        try:
-            _connection = mysql.connector.connect(
+def _get_pool():
+    """Create the connection pool on first use (reads .env once)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            load_dotenv()
+            config = dict(
                 host=os.getenv('DB_HOST'),
                 user=os.getenv('DB_USER'),
                 password=os.getenv('DB_PASSWORD'),
                 database=os.getenv('DB_NAME')
             )
-        except Error as e:
-            print(f"MySQL Error: {e}")
-            raise
-    return _connection
 
+            def connect():
+                try:
+                    return mysql.connector.connect(**config)
+                except Error as e:
+                    print(f"MySQL Error: {e}")
+                    raise
+
+            _pool = ConnectionPool(
+                connect,
+                size=int(os.getenv('DB_POOL_SIZE', 5)),
+                max_overflow=int(os.getenv('DB_POOL_OVERFLOW', 5)),
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', 10)),
+                recycle=float(os.getenv('DB_POOL_RECYCLE', 3600))
+            )
+        return _pool
 
-def close_connection():
-    """Close active connection"""
-    global _connection
-    if _connection and _connection.is_connected():
-        _connection.close()
-        _connection = None
 
-def register_user_to_database(username, biometric_type, encrypted_data, unlock_code, encrypted_aes_key):
+def connection():
     """
-    Save a new user, their biometric data, unlock code, and encrypted AES key into MySQL.
+    Borrow a pooled connection: `with connection() as conn: ...`.
+    The connection goes back to the pool (rolled back if left mid-transaction).
     """
-    conn = get_connection()
+    return _get_pool().connection()
 
-    try:
-        cursor = conn.cursor()
 
-        # Check if user already exists
-        cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
-        result = cursor.fetchone()
+def _query_prepared(query, params, dictionary=False):
+    """Run a hot read query through a cached prepared statement; returns all rows."""
+    pool = _get_pool()
+    with pool.connection() as conn:
+        cursor = pool.prepared_cursor(conn, query, dictionary)
+        cursor.execute(query, params)
+        return cursor.fetchall()
 
-        if result:
-            user_id = result[0]
-        else:
-            cursor.execute("INSERT INTO users (username) VALUES (%s)", (username,))
-            user_id = cursor.lastrowid
 
-        # Save biometric data
-        cursor.execute("""
-            INSERT INTO biometric_data (user_id, type, data)
-            VALUES (%s, %s, %s)
-        """, (user_id, biometric_type, encrypted_data))
+def get_pool_stats():
+    """Checkout counts, wait times and open/idle connections of the pool."""
+    return _get_pool().stats()
 
-        # Save vault settings (unlock code + AES key)
-        cursor.execute("""
-            INSERT INTO vault_settings (user_id, unlock_code, encrypted_aes_key)
-            VALUES (%s, %s, %s)
-        """, (user_id, unlock_code, encrypted_aes_key))
 
-        conn.commit()
+def close_connection():
+    """Close all pooled connections"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
 
-    except Error as e:
+def register_user_to_database(username, biometric_type, encrypted_data, unlock_code, encrypted_aes_key):
+    """
+    Save a new user, their biometric data, unlock code, and encrypted AES key into MySQL.
+    Returns the user's id, or None on error.
+    """
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            try:
+                # Check if user already exists
+                cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
+                result = cursor.fetchone()
+
+                if result:
+                    user_id = result[0]
+                else:
+                    cursor.execute("INSERT INTO users (username) VALUES (%s)", (username,))
+                    user_id = cursor.lastrowid
+
+                # Save biometric data
+                cursor.execute("""
+                    INSERT INTO biometric_data (user_id, type, data)
+                    VALUES (%s, %s, %s)
+                """, (user_id, biometric_type, encrypted_data))
+
+                # Save vault settings (unlock code + AES key)
+                cursor.execute("""
+                    INSERT INTO vault_settings (user_id, unlock_code, encrypted_aes_key)
+                    VALUES (%s, %s, %s)
+                """, (user_id, unlock_code, encrypted_aes_key))
+
+                conn.commit()
+            finally:
+                cursor.close()
+
+        _template_cache.invalidate((username, biometric_type))
+        add_unlock_code(unlock_code)
+        return user_id
+
+    except DB_ERRORS as e:
         print(f"Error saving user to database: {e}")
-
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
+        return None
 
 def get_username_by_unlock_code(unlock_code):
     """
     Retrieve the username associated with a given unlock code.
     Returns None if not found.
     """
-    conn = get_connection()
     try:
-        cursor = conn.cursor()
-        query = """
-            SELECT u.username
-            FROM users u
-            JOIN vault_settings v ON u.id = v.user_id
-            WHERE v.unlock_code = %s
-        """
-        cursor.execute(query, (unlock_code,))
-        result = cursor.fetchone()
-        return result[0] if result else None
-    except Error as e:
+        rows = _query_prepared(USERNAME_BY_UNLOCK_CODE_QUERY, (unlock_code,))
+        return rows[0][0] if rows else None
+    except DB_ERRORS as e:
         print(f"DB Error: {e}")
         return None
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
 
 
-def fetch_user_biometric(username, biometric_type):
+def get_unlock_index():
     """
-    Fetch encrypted biometric data for a user from the database.
-    Returns (user_id, encrypted_data) or (None, None) if not found.
+    Return the in-process index of unlock codes, loading it on first call.
+    On a DB error an empty index is returned and loading is retried next time.
+    """
+    global _unlock_index
+    if _unlock_index is None:
+        try:
+            rows = _query_prepared("SELECT unlock_code FROM vault_settings", ())
+        except DB_ERRORS as e:
+            print(f"DB error loading unlock codes: {e}")
+            return UnlockCodeIndex()
+        _unlock_index = UnlockCodeIndex(code for (code,) in rows)
+    return _unlock_index
+
+
+def add_unlock_code(unlock_code):
+    """Make a newly registered unlock code visible to the index if loaded."""
+    if _unlock_index is not None:
+        _unlock_index.add(unlock_code)
+
+
+def refresh_unlock_index():
+    """Drop the index so the next get_unlock_index() reloads it from the DB."""
+    global _unlock_index
+    _unlock_index = None
+
+
+def _decode_cached(key, version, load, decode):
+    """Return the cached template for key/version, or decode(load()) and cache it."""
+    template = _template_cache.get(key, version)
+    if template is None:
+        encrypted_data = load()
+        if not encrypted_data:
+            return None
+        template = decode(encrypted_data)
+        _template_cache.put(key, version, template)
+    return template
+
+def load_auth_context(username=None, unlock_code=None, biometric_type=None):
     """
-    conn = get_connection()
+    Load everything a login needs in one joined query, looked up by username
+    or by unlock code. biometric_type limits which biometric rows are loaded.
+    Returns None if no such user, otherwise a dict with user_id, username,
+    unlock_code, encrypted_aes_key and biometrics:
+    {type: {"id": row id, "version": (row id, MD5), "data": encrypted blob}}.
+    """
+    if (username is None) == (unlock_code is None):
+        raise ValueError("Pass exactly one of username or unlock_code")
+
+    if username is not None:
+        query, key = AUTH_CONTEXT_BY_USERNAME_QUERY, username
+    else:
+        query, key = AUTH_CONTEXT_BY_UNLOCK_CODE_QUERY, unlock_code
     try:
-        cursor = conn.cursor()
-        # Get user_id
-        cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
-        user_result = cursor.fetchone()
-        if not user_result:
-            return None, None
-        user_id = user_result[0]
-
-        # Get biometric data
-        cursor.execute("""
-            SELECT data FROM biometric_data 
-            WHERE user_id = %s AND type = %s
-        """, (user_id, biometric_type))
-        bio_result = cursor.fetchone()
-
-        if not bio_result:
-            return user_id, None
-
-        return user_id, bio_result[0]
-
-    except Error as e:
-        print(f"DB error in fetch_user_biometric: {e}")
-        return None, None
-
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
+        rows = _query_prepared(query, (biometric_type, biometric_type, key))
+    except DB_ERRORS as e:
+        print(f"DB error in load_auth_context: {e}")
+        return None
+
+    if not rows:
+        return None
+
+    user_id, name, code, encrypted_aes_key = rows[0][:4]
+    context = {
+        "user_id": user_id,
+        "username": name,
+        "unlock_code": code,
+        "encrypted_aes_key": bytes(encrypted_aes_key) if encrypted_aes_key is not None else None,
+        "biometrics": {},
+    }
+    for row in rows:
+        if row[0] != user_id:
+            break  # unlock codes are unique (uq_vault_settings_unlock_code); this only guards old data
+        row_id, bio_type, digest, data = row[4:]
+        if row_id is not None and bio_type not in context["biometrics"]:
+            context["biometrics"][bio_type] = {
+                "id": row_id, "version": (row_id, digest), "data": bytes(data)}
+    return context
+
+def decode_context_template(context, biometric_type, decode):
+    """Decode (through the template cache) a biometric blob loaded by load_auth_context."""
+    bio = context["biometrics"].get(biometric_type)
+    if bio is None:
+        return None
+    return _decode_cached((context["username"], biometric_type), bio["version"],
+                          lambda: bio["data"], decode)
+
+def get_template_cache_stats():
+    """Hit/miss/eviction counters of the decoded template cache."""
+    return _template_cache.stats()
 
-def get_user_unlock_code(username):
-    conn = get_connection()
+def fetch_all_biometrics(biometric_type):
+    """
+    Fetch encrypted biometric data of the given type for every enrolled user.
+    Returns a list of (user_id, username, encrypted_data), empty on error.
+    """
     try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT unlock_code
-            FROM vault_settings
-            WHERE user_id = (
-                SELECT id FROM users WHERE username = %s
-            )
-        """, (username,))
-        result = cursor.fetchone()
-        return result[0] if result else None
-    except Error as e:
-        print(f"DB error in get_user_unlock_code: {e}")
+        with connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(BIOMETRIC_GALLERY_QUERY, (biometric_type,))
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+    except DB_ERRORS as e:
+        print(f"DB error in fetch_all_biometrics: {e}")
+        return []
+
+def fetch_biometric_rows(biometric_type):
+    """Return (id, encrypted_data) for every biometric_data row of a type."""
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT id, data FROM biometric_data WHERE type = %s", (biometric_type,))
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+    except DB_ERRORS as e:
+        print(f"DB error in fetch_biometric_rows: {e}")
+        return []
+
+def update_biometric_rows(updates):
+    """
+    Replace the data of several biometric_data rows in one transaction.
+    updates is a list of (encrypted_data, row_id). Returns True on success.
+    """
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany("UPDATE biometric_data SET data = %s WHERE id = %s", updates)
+                conn.commit()
+            finally:
+                cursor.close()
+        _template_cache.invalidate()
+        return True
+    except DB_ERRORS as e:
+        # Returning the connection to the pool rolls back the partial update
+        print(f"DB error in update_biometric_rows: {e}")
+        return False
+
+
+FILES_PAGE_SIZE = 100  # rows per get_files_page call
+
+
+def _with_formatted_date(row):
+    """Add the display date in Python instead of DATE_FORMAT in SQL."""
+    row['formatted_date'] = row['date_added'].strftime('%Y-%m-%d %H:%M') if row['date_added'] else ''
+    return row
+
+
+def _require_user_id():
+    user_id = get_current_user_id()
+    if not user_id:
+        raise ValueError("Cannot fetch files - no authenticated user")
+    return user_id
+
+
+def get_files_page(after=None, limit=FILES_PAGE_SIZE):
+    """
+    One page of the current user's files, newest first.
+
+    Keyset pagination: after is the (date_added, id) of the last row of the
+    previous page (None for the first page), so deep pages cost the same as
+    the first and rows added meanwhile never shift a page. Raises ValueError
+    if no user is set; returns None on DB error, so callers can tell a
+    failed page from the end of the list.
+    """
+    user_id = _require_user_id()
+    try:
+        if after is None:
+            rows = _query_prepared(FILES_FIRST_PAGE_QUERY, (user_id, limit), dictionary=True)
+        else:
+            after_date, after_id = after
+            rows = _query_prepared(FILES_NEXT_PAGE_QUERY,
+                                   (user_id, after_date, after_date, after_id, limit), dictionary=True)
+        return [_with_formatted_date(row) for row in rows]
+    except DB_ERRORS as e:
+        print(f"Error fetching files page: {e}")
         return None
-    finally:
-        if 'cursor' in locals():
+
+
+def iter_files_for_user(batch_size=500):
+    """
+    Stream the current user's files, newest first, from an unbuffered
+    cursor batch_size rows at a time. Holds a pooled connection until the
+    generator is exhausted or closed. Raises ValueError if no user is set.
+    """
+    user_id = _require_user_id()
+    with connection() as conn:
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        try:
+            cursor.execute("""
+                SELECT id, filename, filepath, date_added
+                FROM files
+                WHERE user_id = %s
+                ORDER BY date_added DESC, id DESC
+            """, (user_id,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield _with_formatted_date(row)
+        finally:
+            # Drain what the caller did not read so the connection is reusable
+            if conn.unread_result:
+                conn.consume_results()
             cursor.close()
 
 
@@ -192,86 +430,255 @@ def get_files_for_user():
     Raises ValueError if no user is currently set.
     Returns list of file dictionaries or empty list on error.
     """
-    conn = get_connection()
-    user_id = get_current_user_id()
+    _require_user_id()
+    try:
+        return list(iter_files_for_user())
+    except DB_ERRORS as e:
+        print(f"Error fetching files: {e}")
+        return []
+
+def get_user_encryption_key(user_id):
+    """Retrieve user's encryption key from database"""
+    with connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT encrypted_key FROM users WHERE id = %s", (user_id,))
+            result = cursor.fetchone()
+            return result['encrypted_key'] if result else None
+        finally:
+            cursor.close()
 
-    if not user_id:
-        raise ValueError("Cannot fetch files - no authenticated user")
 
+def insert_file_records(user_id, records, chunks=None, locations=None):
+    """
+    Insert several files rows in one transaction with a single executemany.
+    records is a list of (original_name, hidden_path). For files kept in the
+    chunk store, chunks maps hidden_path to its [(chunk_id, size), ...] and
+    locations maps newly packed chunk ids to (pack_id, offset, length); the
+    file_chunks rows and chunk reference counts go in the same transaction.
+    Returns the new rows in the same shape as get_files_for_user, or None on error.
+    """
+    if not records:
+        return []
     try:
-        cursor = conn.cursor(dictionary=True)
-        query = """
-            SELECT id, filename, filepath, 
-                   DATE_FORMAT(date_added, '%Y-%m-%d %H:%i') as formatted_date
-            FROM files 
-            WHERE user_id = %s
-            ORDER BY date_added DESC
-        """
-        cursor.execute(query, (user_id,))
-        return cursor.fetchall()
+        with connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.executemany("""
+                    INSERT INTO files (user_id, filename, filepath)
+                    VALUES (%s, %s, %s)
+                """, [(user_id, name, path) for name, path in records])
+                # Read the ids and timestamps back inside the same transaction
+                placeholders = ", ".join(["%s"] * len(records))
+                cursor.execute(f"""
+                    SELECT id, filename, filepath, date_added
+                    FROM files
+                    WHERE user_id = %s AND filepath IN ({placeholders})
+                """, (user_id, *[path for _, path in records]))
+                rows = [_with_formatted_date(row) for row in cursor.fetchall()]
+                if chunks:
+                    _insert_file_chunks(cursor, rows, chunks, locations or {})
+                conn.commit()
+                return rows
+            finally:
+                cursor.close()
+    except DB_ERRORS as e:
+        # Returning the connection to the pool rolls back the partial batch
+        print(f"DB error in insert_file_records: {e}")
+        return None
 
-    except Error as e:
-        print(f"Error fetching files: {e}")
+
+def _insert_file_chunks(cursor, rows, chunks, locations):
+    links = []
+    refs = {}  # chunk_id -> [size, new references]
+    for row in rows:
+        for seq, (chunk_id, size) in enumerate(chunks.get(row['filepath'], ())):
+            links.append((row['id'], seq, chunk_id))
+            refs.setdefault(chunk_id, [size, 0])[1] += 1
+    if not links:
+        return
+    cursor.executemany("""
+        INSERT INTO file_chunks (file_id, seq, chunk_id)
+        VALUES (%s, %s, %s)
+    """, links)
+    # A chunk that already exists keeps its location; only its count changes
+    cursor.executemany("""
+        INSERT INTO vault_chunks (chunk_id, size, refcount, pack_id, pack_offset, pack_length)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE refcount = refcount + VALUES(refcount)
+    """, [(chunk_id, size, count, *locations.get(chunk_id, (None, None, None)))
+          for chunk_id, (size, count) in refs.items()])
+
+
+def get_file_chunks(file_id):
+    """
+    The chunks of one of the current user's files, in order, as
+    (chunk_id, size, pack_id, pack_offset, pack_length); the pack fields
+    are None for chunks stored as loose files.
+    """
+    try:
+        return [tuple(row) for row in _query_prepared("""
+            SELECT c.chunk_id, v.size, v.pack_id, v.pack_offset, v.pack_length
+            FROM file_chunks c
+            JOIN files f ON f.id = c.file_id
+            JOIN vault_chunks v ON v.chunk_id = c.chunk_id
+            WHERE c.file_id = %s AND f.user_id = %s
+            ORDER BY c.seq
+        """, (file_id, get_current_user_id()))]
+    except DB_ERRORS as e:
+        print(f"DB error in get_file_chunks: {e}")
         return []
 
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
 
-def get_user_encryption_key(user_id):
-    """Retrieve user's encryption key from database"""
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+def delete_chunked_file(file_id):
+    """
+    Delete one of the current user's chunk-store files and drop its chunk
+    references in one transaction. Returns (chunk_id, pack_id, pack_offset,
+    pack_length) for the chunks nothing references any more, or None on error.
+    """
     try:
-        cursor.execute("SELECT encrypted_key FROM users WHERE id = %s", (user_id,))
-        result = cursor.fetchone()
-        return result['encrypted_key'] if result else None
-    finally:
-        cursor.close()
+        with connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("""
+                    SELECT c.chunk_id, COUNT(*)
+                    FROM file_chunks c
+                    JOIN files f ON f.id = c.file_id
+                    WHERE c.file_id = %s AND f.user_id = %s
+                    GROUP BY c.chunk_id
+                """, (file_id, get_current_user_id()))
+                released = cursor.fetchall()
+
+                freed = []
+                if released:
+                    cursor.executemany("""
+                        UPDATE vault_chunks SET refcount = refcount - %s
+                        WHERE chunk_id = %s
+                    """, [(count, chunk_id) for chunk_id, count in released])
+                    placeholders = ", ".join(["%s"] * len(released))
+                    chunk_ids = [chunk_id for chunk_id, _ in released]
+                    cursor.execute(f"""
+                        SELECT chunk_id, pack_id, pack_offset, pack_length FROM vault_chunks
+                        WHERE refcount <= 0 AND chunk_id IN ({placeholders})
+                    """, chunk_ids)
+                    freed = [tuple(row) for row in cursor.fetchall()]
+                    if freed:
+                        cursor.execute(f"""
+                            DELETE FROM vault_chunks
+                            WHERE chunk_id IN ({", ".join(["%s"] * len(freed))})
+                        """, [row[0] for row in freed])
+
+                # file_chunks rows go with it (ON DELETE CASCADE)
+                cursor.execute("DELETE FROM files WHERE id = %s AND user_id = %s",
+                               (file_id, get_current_user_id()))
+                conn.commit()
+                return freed
+            finally:
+                cursor.close()
+    except DB_ERRORS as e:
+        print(f"DB error in delete_chunked_file: {e}")
+        return None
 
 
+def get_packed_chunk_ids():
+    """Ids of every chunk stored in a pack segment, or None on error."""
+    try:
+        return [row[0] for row in _query_prepared(
+            "SELECT chunk_id FROM vault_chunks WHERE pack_id IS NOT NULL", ())]
+    except DB_ERRORS as e:
+        print(f"DB error in get_packed_chunk_ids: {e}")
+        return None
 
-def insert_file_record(user_id, original_name, hidden_path):
-    conn = get_connection()
+
+def get_chunk_location(chunk_id):
+    """(pack_id, pack_offset, pack_length) of a packed chunk, or None if it is not packed or on error."""
     try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO files (user_id, filename, filepath)
-            VALUES (%s, %s, %s)
-        """, (user_id, original_name, hidden_path))
-        conn.commit()
-    except Error as e:
-        print(f"DB error in insert_file_record: {e}")
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
+        rows = _query_prepared("""
+            SELECT pack_id, pack_offset, pack_length FROM vault_chunks
+            WHERE chunk_id = %s AND pack_id IS NOT NULL
+        """, (chunk_id,))
+        return tuple(rows[0]) if rows else None
+    except DB_ERRORS as e:
+        print(f"DB error in get_chunk_location: {e}")
+        return None
+
+
+def get_pack_usage():
+    """Live bytes per pack segment as {pack_id: bytes}, or None on error."""
+    try:
+        return {pack_id: int(live) for pack_id, live in _query_prepared("""
+            SELECT pack_id, SUM(pack_length)
+            FROM vault_chunks
+            WHERE pack_id IS NOT NULL
+            GROUP BY pack_id
+        """, ())}
+    except DB_ERRORS as e:
+        print(f"DB error in get_pack_usage: {e}")
+        return None
+
+
+def get_pack_entries(pack_id):
+    """Live objects of one pack segment as [(chunk_id, offset, length)] by offset, or None on error."""
+    try:
+        return [tuple(row) for row in _query_prepared("""
+            SELECT chunk_id, pack_offset, pack_length
+            FROM vault_chunks
+            WHERE pack_id = %s
+            ORDER BY pack_offset
+        """, (pack_id,))]
+    except DB_ERRORS as e:
+        print(f"DB error in get_pack_entries: {e}")
+        return None
+
+
+def move_packed_chunks(moves):
+    """
+    Point packed chunks at their compacted copies in one transaction.
+    moves is a list of (new_pack_id, new_offset, chunk_id, old_pack_id).
+    Returns True on success.
+    """
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany("""
+                    UPDATE vault_chunks SET pack_id = %s, pack_offset = %s
+                    WHERE chunk_id = %s AND pack_id = %s
+                """, moves)
+                conn.commit()
+            finally:
+                cursor.close()
+        return True
+    except DB_ERRORS as e:
+        print(f"DB error in move_packed_chunks: {e}")
+        return False
 
 
 def delete_file_record(file_id):
-    conn = get_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM files WHERE id = %s", (file_id,))
-        conn.commit()
-    except Error as e:
+        with connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("DELETE FROM files WHERE id = %s", (file_id,))
+                conn.commit()
+            finally:
+                cursor.close()
+    except DB_ERRORS as e:
         print(f"DB error in delete_file_record: {e}")
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
 
 
 def get_file_record_by_id(file_id):
-    conn = get_connection()
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT filename, filepath FROM files
-            WHERE id = %s AND user_id = %s
-        """, (file_id, get_current_user_id()))
-        return cursor.fetchone()
-    except Error as e:
+        with connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute("""
+                    SELECT filename, filepath FROM files
+                    WHERE id = %s AND user_id = %s
+                """, (file_id, get_current_user_id()))
+                return cursor.fetchone()
+            finally:
+                cursor.close()
+    except DB_ERRORS as e:
         print(f"DB error in get_file_record_by_id: {e}")
         return None
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
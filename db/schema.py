@@ -0,0 +1,282 @@
+"""
+Versioned MySQL schema for RedactedVault.
+
+MIGRATIONS is an ordered list of (version, description, steps). Each
+step is idempotent, so upgrading an install that was created by hand
+(or half-migrated) is safe, and the applied version is recorded in
+schema_version. Run
+
+    python -m db.schema            upgrade to the latest version
+    python -m db.schema check      EXPLAIN the hot queries and report full scans
+
+tests/test_query_plans.py runs the same EXPLAIN check under pytest.
+"""
+import sys
+
+from db.db_manager import (
+    connection, DB_ERRORS,
+    USER_ID_QUERY, USERNAME_BY_UNLOCK_CODE_QUERY,
+    AUTH_CONTEXT_BY_USERNAME_QUERY, AUTH_CONTEXT_BY_UNLOCK_CODE_QUERY,
+    FILES_FIRST_PAGE_QUERY, FILES_NEXT_PAGE_QUERY,
+)
+
+SCHEMA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT NOT NULL PRIMARY KEY,
+        description VARCHAR(255) NOT NULL,
+        applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB
+"""
+
+BASE_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        username VARCHAR(100) NOT NULL,
+        encrypted_key BLOB NULL
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS biometric_data (
+        id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        type VARCHAR(16) NOT NULL,
+        data LONGBLOB NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS vault_settings (
+        id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        unlock_code VARCHAR(64) NOT NULL,
+        encrypted_aes_key BLOB NULL,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS files (
+        id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        filename VARCHAR(255) NOT NULL,
+        filepath VARCHAR(512) NOT NULL,
+        date_added DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    ) ENGINE=InnoDB
+    """,
+]
+
+# (table, index name, columns, unique)
+INDEXES = [
+    # Login by codename, registration's existence check
+    ("users", "uq_users_username", "username", True),
+    # Calculator unlock lookup and the unlock-code index load
+    # (replaced by the unique uq_vault_settings_unlock_code in version 5)
+    ("vault_settings", "idx_vault_settings_unlock_code", "unlock_code", False),
+    # Template fetch by user and type, and the gallery load by type
+    ("biometric_data", "idx_biometric_user_type", "user_id, type", False),
+    ("biometric_data", "idx_biometric_type", "type", False),
+    # Vault open and keyset paging; InnoDB appends id to every secondary index
+    ("files", "idx_files_user_date", "user_id, date_added", False),
+    # Reading rows back by blob path after a batch insert
+    ("files", "idx_files_filepath", "filepath", False),
+]
+
+
+def _create_tables(cursor):
+    for ddl in BASE_TABLES:
+        cursor.execute(ddl)
+
+
+def _index_exists(cursor, table, name):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+    """, (table, name))
+    return cursor.fetchone() is not None
+
+
+def _ensure_indexes(cursor):
+    # MySQL has no CREATE INDEX IF NOT EXISTS, so look each one up first
+    for table, name, columns, unique in INDEXES:
+        if not _index_exists(cursor, table, name):
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            cursor.execute(f"ALTER TABLE {table} ADD {kind} {name} ({columns})")
+
+
+CHUNK_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS vault_chunks (
+        chunk_id CHAR(64) NOT NULL PRIMARY KEY,
+        size INT NOT NULL,
+        refcount INT NOT NULL
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS file_chunks (
+        file_id INT NOT NULL,
+        seq INT NOT NULL,
+        chunk_id CHAR(64) NOT NULL,
+        PRIMARY KEY (file_id, seq),
+        INDEX idx_file_chunks_chunk (chunk_id),
+        FOREIGN KEY (file_id) REFERENCES files(id) ON DELETE CASCADE
+    ) ENGINE=InnoDB
+    """,
+]
+
+
+def _create_chunk_tables(cursor):
+    for ddl in CHUNK_TABLES:
+        cursor.execute(ddl)
+
+
+def _column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        LIMIT 1
+    """, (table, column))
+    return cursor.fetchone() is not None
+
+
+def _add_pack_columns(cursor):
+    # Where a small chunk lives inside a pack segment; NULL for loose chunk files
+    for column, definition in [("pack_id", "INT NULL"),
+                               ("pack_offset", "BIGINT NULL"),
+                               ("pack_length", "INT NULL")]:
+        if not _column_exists(cursor, "vault_chunks", column):
+            cursor.execute(f"ALTER TABLE vault_chunks ADD COLUMN {column} {definition}")
+    if not _index_exists(cursor, "vault_chunks", "idx_vault_chunks_pack"):
+        cursor.execute("ALTER TABLE vault_chunks ADD INDEX idx_vault_chunks_pack (pack_id, pack_offset)")
+
+
+def _unique_unlock_codes(cursor):
+    # load_auth_context looks a user up by unlock code alone; a duplicate would
+    # log into whichever row comes first. Fails (and is retried) while duplicates exist
+    if not _index_exists(cursor, "vault_settings", "uq_vault_settings_unlock_code"):
+        cursor.execute("ALTER TABLE vault_settings ADD UNIQUE INDEX uq_vault_settings_unlock_code (unlock_code)")
+    if _index_exists(cursor, "vault_settings", "idx_vault_settings_unlock_code"):
+        cursor.execute("ALTER TABLE vault_settings DROP INDEX idx_vault_settings_unlock_code")
+
+
+MIGRATIONS = [
+    (1, "base tables", [_create_tables]),
+    (2, "indexes for login, unlock and vault queries", [_ensure_indexes]),
+    (3, "content-addressed chunk store", [_create_chunk_tables]),
+    (4, "pack segments for small chunks", [_add_pack_columns]),
+    (5, "unique unlock codes", [_unique_unlock_codes]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(cursor):
+    cursor.execute(SCHEMA_VERSION_TABLE)
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+
+def migrate(conn, target=LATEST_VERSION):
+    """
+    Apply every migration newer than the recorded version, up to target, on
+    conn's current database. Returns the version it ends at; DB errors propagate.
+    """
+    cursor = conn.cursor()
+    try:
+        current = get_schema_version(cursor)
+        for version, description, steps in MIGRATIONS:
+            if version <= current or version > target:
+                continue
+            # DDL commits implicitly, which is why every step is idempotent
+            for step in steps:
+                step(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                (version, description))
+            conn.commit()
+            print(f"Schema upgraded to version {version}: {description}")
+            current = version
+        return current
+    finally:
+        cursor.close()
+
+
+def upgrade_schema(target=LATEST_VERSION):
+    """
+    Upgrade the database from .env to target (see migrate).
+    Returns the version the database ends at, or None on error.
+    """
+    try:
+        with connection() as conn:
+            return migrate(conn, target)
+    except DB_ERRORS as e:
+        print(f"Schema upgrade failed: {e}")
+        return None
+
+
+# The real hot queries with representative parameters; each must use an index.
+# The identification gallery reads every template of a type by design, so it is not one
+HOT_QUERIES = [
+    ("login by username", USER_ID_QUERY, ("someone",)),
+    ("unlock code lookup", USERNAME_BY_UNLOCK_CODE_QUERY, ("1234",)),
+    ("login context by username", AUTH_CONTEXT_BY_USERNAME_QUERY, ("finger", "finger", "someone")),
+    ("login context by unlock code", AUTH_CONTEXT_BY_UNLOCK_CODE_QUERY, ("finger", "finger", "1234")),
+    ("login context, every biometric", AUTH_CONTEXT_BY_UNLOCK_CODE_QUERY, (None, None, "1234")),
+    ("vault first page", FILES_FIRST_PAGE_QUERY, (1, 100)),
+    ("vault next page", FILES_NEXT_PAGE_QUERY,
+     (1, "2030-01-01 00:00:00", "2030-01-01 00:00:00", 1000, 100)),
+]
+
+
+def explain_problems(cursor, sql, params):
+    """
+    EXPLAIN one query on a dictionary cursor and return the problems found:
+    full table scans, no key used, or a filesort.
+    """
+    problems = []
+    cursor.execute("EXPLAIN " + sql, params)
+    for row in cursor.fetchall():
+        extra = row.get("Extra") or ""
+        if "no matching row" in extra or "Impossible WHERE" in extra:
+            continue  # answered from the index without reading the table
+        if row.get("type") == "ALL":
+            problems.append(f"full scan of {row.get('table')}")
+        elif not row.get("key"):
+            problems.append(f"no index used on {row.get('table')}")
+        if "filesort" in extra:
+            problems.append("sorts with a filesort")
+    return problems
+
+
+def check_query_plans():
+    """
+    EXPLAIN every hot query and return a list of (name, problem) for the
+    ones that scan the whole table, use no key or sort with a filesort.
+    An empty list means every login and vault-open query is an index lookup.
+    On nearly empty tables MySQL may prefer a scan, so run it on real data.
+    """
+    problems = []
+    with connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            for name, sql, params in HOT_QUERIES:
+                problems.extend((name, problem) for problem in explain_problems(cursor, sql, params))
+        finally:
+            cursor.close()
+    return problems
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "check":
+        upgrade_schema()
+        problems = check_query_plans()
+        for name, problem in problems:
+            print(f"{name}: {problem}")
+        print("All hot queries use indexes." if not problems else f"{len(problems)} problem(s) found.")
+        sys.exit(1 if problems else 0)
+
+    version = upgrade_schema()
+    if version is None:
+        sys.exit(1)
+    print(f"Schema is at version {version}.")
@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class TemplateCache:
+    """
+    Bounded LRU cache of decoded biometric templates (NumPy arrays).
+    Entries expire after ttl seconds and are only served while the stored
+    version still matches. Evicted buffers are overwritten with zeros.
+    """
+
+    def __init__(self, max_entries=64, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (version, stored_at, array)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, version):
+        """Return a private copy of the cached template, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                cached_version, stored_at, value = entry
+                if cached_version == version and time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    # Callers get a copy so eviction can safely wipe the original
+                    return value.copy()
+                self._evict(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, version, value):
+        # Own a writable copy so it can be zeroized later
+        value = np.array(value, copy=True)
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = (version, time.monotonic(), value)
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+    def invalidate(self, key=None):
+        """Drop one entry, or everything when key is None."""
+        with self._lock:
+            for k in ([key] if key is not None else list(self._entries)):
+                if k in self._entries:
+                    self._evict(k)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+    def _evict(self, key):
+        _, _, value = self._entries.pop(key)
+        if value.flags.c_contiguous:
+            value.view(np.uint8).fill(0)
+        else:
+            value[...] = 0
+        self.evictions += 1
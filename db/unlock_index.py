@@ -0,0 +1,54 @@
+import hashlib
+import hmac
+import os
+import threading
+
+MIN_CODE_LENGTH = 6  # shorter codes would unlock on everyday arithmetic
+
+
+class UnlockCodeIndex:
+    """
+    In-memory set of keyed hashes of every unlock code.
+
+    Codes are HMAC-SHA256'd with a random per-process key, so the plaintext
+    codes are not kept around once loaded. match_suffix checks whether the
+    calculator input ends with any known code using one hash per distinct
+    code length, without touching the database. Codes shorter than
+    MIN_CODE_LENGTH are never indexed, so they never match.
+    """
+
+    def __init__(self, codes=()):
+        self._key = os.urandom(32)
+        self._hashes = set()
+        self._lengths = set()
+        self._lock = threading.Lock()
+        for code in codes:
+            self.add(code)
+
+    def _digest(self, code):
+        return hmac.new(self._key, code.encode(), hashlib.sha256).digest()
+
+    def add(self, code):
+        if not code or len(code) < MIN_CODE_LENGTH:
+            return
+        digest = self._digest(code)
+        with self._lock:
+            self._hashes.add(digest)
+            self._lengths.add(len(code))
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, code):
+        return self._digest(code) in self._hashes
+
+    def match_suffix(self, text):
+        """Return the longest known code that text ends with, or None."""
+        with self._lock:
+            lengths = sorted(self._lengths, reverse=True)
+        for length in lengths:
+            if length < MIN_CODE_LENGTH:
+                break
+            if length <= len(text) and self._digest(text[-length:]) in self._hashes:
+                return text[-length:]
+        return None
@@ -0,0 +1,80 @@
+"""
+Binary face-encoding format.
+
+Layout (little-endian), encrypted with Fernet like the old text encodings:
+
+    header  4s magic b"RVFE" | B version | B bytes per value (4 or 8) | H count
+    body    count raw float32 or float64 values
+
+Decoding is a zero-copy np.frombuffer over the decrypted bytes. The legacy
+comma-separated decimal text is still recognised on read.
+
+Run from the repository root with:
+    python -m face_authentication.encoding_format migrate [path/to/secret.key]
+to rewrite legacy face rows in the biometric_data table in place.
+The key defaults to the vault's gui/secret.key, wherever this is run from.
+"""
+import os
+import sys
+import struct
+import numpy as np
+
+MAGIC = b"RVFE"
+VERSION = 1
+HEADER = struct.Struct("<4sBBH")
+DTYPES = {4: np.dtype("<f4"), 8: np.dtype("<f8")}
+
+DEFAULT_KEY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gui", "secret.key")
+
+
+def is_binary_encoding(data):
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def encode_encoding(encoding, dtype=np.float32):
+    """Pack a face encoding into header + raw little-endian floats."""
+    values = np.asarray(encoding, dtype=np.dtype(dtype).newbyteorder("<"))
+    return HEADER.pack(MAGIC, VERSION, values.itemsize, values.size) + values.tobytes()
+
+
+def decode_encoding(data):
+    """Decode a decrypted face encoding in either the binary or the legacy text format."""
+    if not is_binary_encoding(data):
+        return np.array(list(map(float, bytes(data).decode().split(','))))
+    magic, version, itemsize, count = HEADER.unpack_from(data)
+    if version != VERSION or itemsize not in DTYPES:
+        raise ValueError(f"unsupported face encoding version {version}")
+    return np.frombuffer(data, dtype=DTYPES[itemsize], count=count, offset=HEADER.size)
+
+
+def migrate_encodings(key):
+    """Rewrite every legacy text face encoding as a binary one. Returns rows updated."""
+    from cryptography.fernet import Fernet
+    from db.db_manager import fetch_biometric_rows, update_biometric_rows
+
+    fernet = Fernet(key)
+    updates = []
+    for row_id, encrypted_data in fetch_biometric_rows("face"):
+        try:
+            plain = fernet.decrypt(encrypted_data)
+        except Exception as e:
+            print(f"Skipping row {row_id}: {e}")
+            continue
+        if is_binary_encoding(plain):
+            continue
+        updates.append((fernet.encrypt(encode_encoding(decode_encoding(plain))), row_id))
+
+    if updates and not update_biometric_rows(updates):
+        return 0
+    return len(updates)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3) or sys.argv[1] != "migrate":
+        print("Usage: python -m face_authentication.encoding_format migrate [path/to/secret.key]")
+        sys.exit(1)
+
+    key_path = sys.argv[2] if len(sys.argv) == 3 else DEFAULT_KEY_PATH
+    with open(key_path, "rb") as key_file:
+        migrated = migrate_encodings(key_file.read())
+    print(f"Migrated {migrated} face encoding(s).")
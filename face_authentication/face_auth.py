@@ -4,7 +4,12 @@ import cv2
 import face_recognition
 import numpy as np
 from cryptography.fernet import Fernet
-from db.db_manager import fetch_user_biometric, get_user_unlock_code
+from db.db_manager import load_auth_context, decode_context_template, fetch_all_biometrics
+from face_authentication.face_gallery import FaceGallery, TOLERANCE
+from face_authentication.encoding_format import decode_encoding
+
+# Packed encodings of every enrolled face, loaded on first identification
+_face_gallery = None
 
 def load_key():
     """Load the saved encryption key."""
@@ -15,51 +20,42 @@ def load_key():
 def decrypt_encoding(encrypted_data, key):
     """Decrypt the encrypted face encoding."""
     fernet = Fernet(key)
-    decrypted_bytes = fernet.decrypt(encrypted_data)
-    encoding_list = list(map(float, decrypted_bytes.decode().split(',')))
-    return np.array(encoding_list)
+    return decode_encoding(fernet.decrypt(encrypted_data))
 
 
-def authenticate_face(username):
-    print("🔐 Face Authentication")
+def get_face_gallery():
+    """Decrypt every stored face encoding into the shared FaceGallery (once)."""
+    global _face_gallery
+    if _face_gallery is None:
+        key = load_key()
+        gallery = FaceGallery()
+        for user_id, username, encrypted_data in fetch_all_biometrics('face'):
+            try:
+                gallery.add(user_id, username, decrypt_encoding(encrypted_data, key))
+            except Exception as e:
+                print(f"Skipping face data of user {user_id}: {e}")
+        _face_gallery = gallery
+    return _face_gallery
 
-    # Load key and fetch data from DB
-    key = load_key()
-    encrypted_data = None
-    unlock_code = None
 
-    try:
-        user_id, encrypted_data = fetch_user_biometric(username, 'face')
-        unlock_code = get_user_unlock_code(username)
-    except Exception as e:
-        print(f"Error accessing user data: {e}")
-        return False
+def add_to_face_gallery(user_id, username, encoding):
+    """Append a newly registered face if the gallery is already loaded."""
+    if _face_gallery is not None:
+        _face_gallery.add(user_id, username, encoding)
 
-    if not encrypted_data:
-        print("No face data found for this user.")
-        return False
-
-    if not unlock_code:
-        print("No unlock code found for this user.")
-        return False
 
-    try:
-        known_encoding = decrypt_encoding(encrypted_data, key)
-    except Exception as e:
-        print(f"Decryption failed: {e}")
-        return False
-
-    # Begin face capture
+def capture_face_encoding(window_title):
+    """Show the camera until 's' is pressed; return the face encoding or None."""
     cap = cv2.VideoCapture(0)
-    print("📷 Press 's' to scan your face for authentication.")
-    auth_success = False
+    print("📷 Press 's' to scan your face.")
+    face_encoding = None
 
     while True:
         ret, frame = cap.read()
         if not ret:
             continue
 
-        cv2.imshow("Face Authentication", frame)
+        cv2.imshow(window_title, frame)
 
         if cv2.waitKey(1) & 0xFF == ord('s'):
             rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -67,19 +63,79 @@ def authenticate_face(username):
 
             if face_locations:
                 face_encoding = face_recognition.face_encodings(rgb, face_locations)[0]
-                match = face_recognition.compare_faces([known_encoding], face_encoding)[0]
-
-                if match:
-                    print(f"✅ Face matched. Welcome, {username}!")
-                    auth_success = True
-                else:
-                    print("❌ Face mismatch.")
             else:
                 print("⚠️ No face detected. Try again.")
             break
 
     cap.release()
     cv2.destroyAllWindows()
+    return face_encoding
+
+
+def identify_face(top_k=1):
+    """
+    Identify the person in front of the camera among all enrolled faces.
+    Returns up to top_k (user_id, username, distance), closest first.
+    """
+    print("🔐 Face Identification")
+
+    try:
+        gallery = get_face_gallery()
+    except Exception as e:
+        print(f"Error loading face data: {e}")
+        return []
+
+    face_encoding = capture_face_encoding("Face Identification")
+    if face_encoding is None:
+        return []
+
+    matches = gallery.identify(face_encoding, TOLERANCE, top_k)
+    if matches:
+        print(f"✅ Face identified. Welcome, {matches[0][1]}!")
+    else:
+        print("❌ Face not recognised.")
+    return matches
+
+
+def authenticate_face(username, context=None):
+    """context: optional load_auth_context result, saves the DB round trip."""
+    print("🔐 Face Authentication")
+
+    # Fetch the decoded encoding (cached; the key is only read on a cache miss)
+    known_encoding = None
+    unlock_code = None
+
+    try:
+        if context is None or context["username"] != username or 'face' not in context["biometrics"]:
+            context = load_auth_context(username=username, biometric_type='face')
+        if context:
+            known_encoding = decode_context_template(
+                context, 'face', lambda data: decrypt_encoding(data, load_key()))
+            unlock_code = context["unlock_code"]
+    except Exception as e:
+        print(f"Error accessing user data: {e}")
+        return False
+
+    if known_encoding is None:
+        print("No face data found for this user.")
+        return False
+
+    if not unlock_code:
+        print("No unlock code found for this user.")
+        return False
+
+    # Begin face capture
+    auth_success = False
+    face_encoding = capture_face_encoding("Face Authentication")
+
+    if face_encoding is not None:
+        match = face_recognition.compare_faces([known_encoding], face_encoding)[0]
+
+        if match:
+            print(f"✅ Face matched. Welcome, {username}!")
+            auth_success = True
+        else:
+            print("❌ Face mismatch.")
 
     if auth_success:
         print("✅ Authentication successful. Vault opened.")
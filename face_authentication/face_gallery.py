@@ -0,0 +1,86 @@
+"""
+Packed face-encoding gallery for 1:N identification.
+
+Every enrolled user's 128-d encoding lives in one contiguous float32 matrix,
+so identifying a face is a single matrix-vector product instead of a
+compare_faces call per user. Rows are appended in place as users register.
+
+Run this file directly to benchmark identification at 10k and 100k identities.
+"""
+import time
+import numpy as np
+
+ENCODING_SIZE = 128
+TOLERANCE = 0.6  # same default as face_recognition.compare_faces
+
+
+class FaceGallery:
+    """Growable float32 matrix of face encodings plus the owning users."""
+
+    def __init__(self, capacity=64):
+        self.matrix = np.empty((capacity, ENCODING_SIZE), dtype=np.float32)
+        self.sq_norms = np.empty(capacity, dtype=np.float32)
+        self.user_ids = []
+        self.usernames = []
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def add(self, user_id, username, encoding):
+        """Append one encoding, doubling the backing matrix when full."""
+        n = len(self)
+        if n == len(self.matrix):
+            grown = np.empty((max(2 * n, 1), ENCODING_SIZE), dtype=np.float32)
+            grown[:n] = self.matrix[:n]
+            norms = np.empty(len(grown), dtype=np.float32)
+            norms[:n] = self.sq_norms[:n]
+            self.matrix, self.sq_norms = grown, norms
+        self.matrix[n] = encoding
+        self.sq_norms[n] = self.matrix[n] @ self.matrix[n]
+        self.user_ids.append(user_id)
+        self.usernames.append(username)
+
+    def distances(self, encoding):
+        """Euclidean distance from encoding to every stored row."""
+        n = len(self)
+        probe = np.asarray(encoding, dtype=np.float32)
+        # |a - b|^2 = |a|^2 - 2 a.b + |b|^2, one matrix-vector product for all rows
+        sq = self.sq_norms[:n] - 2 * (self.matrix[:n] @ probe) + probe @ probe
+        return np.sqrt(np.maximum(sq, 0))
+
+    def identify(self, encoding, tolerance=TOLERANCE, top_k=1):
+        """
+        Return up to top_k (user_id, username, distance) within tolerance,
+        closest first. Empty list if nobody matches.
+        """
+        if not len(self):
+            return []
+        dists = self.distances(encoding)
+        k = min(top_k, len(dists))
+        nearest = np.argpartition(dists, k - 1)[:k]
+        nearest = nearest[np.argsort(dists[nearest], kind="stable")]
+        return [(self.user_ids[i], self.usernames[i], float(dists[i]))
+                for i in nearest if dists[i] <= tolerance]
+
+
+def benchmark(sizes=(10_000, 100_000), repeats=20):
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        gallery = FaceGallery(capacity=size)
+        encodings = rng.normal(0, 0.1, (size, ENCODING_SIZE)).astype(np.float32)
+        start = time.perf_counter()
+        for i, encoding in enumerate(encodings):
+            gallery.add(i, f"user{i}", encoding)
+        build = time.perf_counter() - start
+
+        probe = encodings[size // 2] + rng.normal(0, 0.01, ENCODING_SIZE)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            result = gallery.identify(probe, top_k=5)
+        per_query = (time.perf_counter() - start) / repeats
+        print(f"{size:>7} identities: build {build * 1000:8.1f} ms, "
+              f"identify {per_query * 1000:6.2f} ms, best {result[0][1] if result else None}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -3,6 +3,8 @@ import face_recognition
 from cryptography.fernet import Fernet
 import os
 from db.db_manager import set_current_user, get_current_user_id, get_user_encryption_key, register_user_to_database
+from face_authentication.face_auth import add_to_face_gallery
+from face_authentication.encoding_format import encode_encoding
 
 # Secret code trigger
 SECRET_TRIGGER = "0000+-"
@@ -72,16 +74,15 @@ def register_face(username,code):
         aes_key = generate_aes_key()
         encrypted_aes_key = encrypt_aes_key(aes_key, key)
 
-        # Convert face encoding to a string (required for encryption)
-        encoding_str = ','.join(map(str, face_encoding))
-
-        # Encrypt the face encoding data
+        # Encrypt the face encoding as packed binary floats
         fernet = Fernet(key)
-        encrypted_data = fernet.encrypt(encoding_str.encode())
+        encrypted_data = fernet.encrypt(encode_encoding(face_encoding))
 
         # Save encrypted data and unlock code to the database
         print("Saving face data to the database...")
-        register_user_to_database(username, "face", encrypted_data, unlock_code, encrypted_aes_key)
+        user_id = register_user_to_database(username, "face", encrypted_data, unlock_code, encrypted_aes_key)
+        if user_id:
+            add_to_face_gallery(user_id, username, face_encoding)
 
         print(f"🎉 {username} registered successfully!")
         return True
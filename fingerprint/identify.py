@@ -0,0 +1,169 @@
+"""
+1:N fingerprint identification ("touch to identify").
+
+All enrolled finger templates are decrypted once into a TemplateGallery,
+a packed structure holding every minutia in one array plus per-template
+global features. A scan is first screened against all templates at once
+using those features; exact matching then runs on the survivors, most
+likely first, until none left could beat the best match.
+
+Run with: python fingerprint/identify.py -   (raw scan on stdin)
+"""
+import sys
+import time
+import numpy as np
+from cryptography.fernet import Fernet
+from match_utils import (IMG_WIDTH, IMG_HEIGHT, MINUTIA_TYPES, MinutiaeIndex,
+                         as_minutiae_array, minutiae_from_image)
+from template_format import load_template
+from db.db_manager import fetch_all_biometrics
+
+MATCH_THRESHOLD = 0.70
+MIN_MINUTIAE = 10
+SHORTLIST_SIZE = 32
+GRID = 4  # spatial histogram is GRID x GRID cells
+
+
+def load_key():
+    """Load Fernet master key."""
+    with open("secret.key", "rb") as key_file:
+        return key_file.read()
+
+
+def _global_features(points):
+    """Per-type counts and a normalised GRID x GRID spatial histogram."""
+    type_counts = np.bincount(points[:, 2], minlength=len(MINUTIA_TYPES))
+    cx = np.clip(points[:, 0] * GRID // IMG_WIDTH, 0, GRID - 1)
+    cy = np.clip(points[:, 1] * GRID // IMG_HEIGHT, 0, GRID - 1)
+    hist = np.bincount(cy * GRID + cx, minlength=GRID * GRID).astype(np.float32)
+    return type_counts, hist / max(len(points), 1)
+
+
+class TemplateGallery:
+    """Every enrolled template of one biometric type, packed for bulk screening."""
+
+    def __init__(self, entries):
+        """entries: iterable of (user_id, username, minutiae) with minutiae as list or array."""
+        self.user_ids, self.usernames, arrays = [], [], []
+        for user_id, username, minutiae in entries:
+            self.user_ids.append(user_id)
+            self.usernames.append(username)
+            arrays.append(as_minutiae_array(minutiae))
+
+        lengths = np.array([len(a) for a in arrays], dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(lengths)))
+        self.points = (np.concatenate(arrays) if arrays
+                       else np.empty((0, 3), dtype=np.int32))
+
+        features = [_global_features(a) for a in arrays]
+        self.type_counts = np.array([f[0] for f in features], dtype=np.int32).reshape(-1, len(MINUTIA_TYPES))
+        self.histograms = np.array([f[1] for f in features], dtype=np.float32).reshape(-1, GRID * GRID)
+        self._indexes = {}
+        self.loaded_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def template(self, i):
+        return self.points[self.offsets[i]:self.offsets[i + 1]]
+
+    def _index(self, i):
+        if i not in self._indexes:
+            self._indexes[i] = MinutiaeIndex(self.template(i))
+        return self._indexes[i]
+
+    def shortlist(self, live, threshold=MATCH_THRESHOLD, size=SHORTLIST_SIZE):
+        """
+        Templates worth matching exactly, as (indices, bounds), where bound is
+        the ratio even a perfect per-type pairing could reach. Templates whose
+        bound does not clear threshold are dropped, which never loses a match.
+        The size templates whose minutiae are laid out most like the scan
+        come first, the rest follow by falling bound, so identify() can stop
+        once no bound beats the best ratio found.
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        live_counts, live_hist = _global_features(live)
+        stored_totals = np.maximum(self.type_counts.sum(axis=1), 1)
+        bounds = np.minimum(self.type_counts, live_counts).sum(axis=1) / stored_totals
+        candidates = np.flatnonzero(bounds > threshold)
+
+        # Likely matches first, so the best ratio rises early
+        distance = np.abs(self.histograms[candidates] - live_hist).sum(axis=1)
+        by_distance = np.argsort(distance, kind="stable")
+        head, tail = by_distance[:size], by_distance[size:]
+        tail = tail[np.argsort(-bounds[candidates[tail]], kind="stable")]
+        order = candidates[np.concatenate((head, tail))]
+        return order, bounds[order]
+
+    def identify(self, live, threshold=MATCH_THRESHOLD, size=SHORTLIST_SIZE):
+        """
+        Find the best-matching enrolled user for live minutiae.
+        Returns (user_id, username, ratio), or None if nobody clears threshold.
+        """
+        live = as_minutiae_array(live)
+        best = None
+        order, bounds = self.shortlist(live, threshold, size)
+        for position, (i, bound) in enumerate(zip(order, bounds)):
+            if best is not None and bound <= best[2]:
+                if position >= size:
+                    break  # the rest are sorted by bound, none can do better
+                continue
+            matches, _, stored = self._index(i).match(live)
+            ratio = matches / max(stored, 1)
+            if ratio > threshold and (best is None or ratio > best[2]):
+                best = (self.user_ids[i], self.usernames[i], ratio)
+        return best
+
+
+def load_gallery(key=None):
+    """Decrypt every enrolled fingerprint template into a TemplateGallery."""
+    fernet = Fernet(key or load_key())
+    entries = []
+    for user_id, username, encrypted_data in fetch_all_biometrics("finger"):
+        try:
+            minutiae = load_template(fernet.decrypt(encrypted_data))
+        except Exception as e:
+            print(f"❌ Skipping template of user {user_id}: {e}")
+            continue
+        entries.append((user_id, username, minutiae))
+    return TemplateGallery(entries)
+
+
+def identify_fingerprint_image(raw, gallery=None):
+    """Identify who a raw scan belongs to. Returns (user_id, username, ratio) or None."""
+    print("🔐 Fingerprint Identification")
+    try:
+        live = minutiae_from_image(raw)
+    except ValueError:
+        print("❌ Invalid fingerprint size.")
+        return None
+
+    if len(live) < MIN_MINUTIAE:
+        print("❌ Poor fingerprint quality.")
+        return None
+
+    if gallery is None:
+        gallery = load_gallery()
+    result = gallery.identify(live)
+
+    if result:
+        print(f"✅ Identified {result[1]} (ratio {result[2]:.3f}).")
+    else:
+        print("❌ No enrolled fingerprint matched.")
+    return result
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["-"]:
+        print("Usage: python identify.py -   (raw scan on stdin)")
+        sys.exit(1)
+
+    result = identify_fingerprint_image(sys.stdin.buffer.read())
+
+    if result:
+        print(f"IDENTIFIED:{result[1]}")
+        sys.exit(0)
+    else:
+        print("AUTH_FAIL")
+        sys.exit(1)
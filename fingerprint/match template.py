@@ -1,84 +1,79 @@
-import os
 import sys
-import json
-import numpy as np
 from cryptography.fernet import Fernet
-from match_utils import preprocess_fingerprint, extract_minutiae, compare_minutiae
-from db.db_manager import fetch_user_biometric, get_user_unlock_code
+from match_utils import minutiae_from_image, compare_minutiae
+from template_format import load_template
+from db.db_manager import load_auth_context, decode_context_template
 
-IMG_WIDTH, IMG_HEIGHT = 260, 300
-FINGERPRINT_DIR = os.path.join("fingerprint", "fingerprints")
+MATCH_THRESHOLD = 0.70
+MIN_MINUTIAE = 10
 
 def load_key():
     """Load Fernet master key."""
     with open("secret.key", "rb") as key_file:
         return key_file.read()
 
-def authenticate_fingerprint(username):
-    print("🔐 Fingerprint Authentication")
-
-    # === Load encrypted minutiae from DB ===
-    key = load_key()
-    user_id, encrypted_data = fetch_user_biometric(username, "finger")
+def match_scan(raw, stored_minutiae):
+    """
+    Match a raw scan against decrypted stored minutiae.
+    Returns the match ratio, or None if the scan is unusable.
+    """
+    try:
+        live_minutiae = minutiae_from_image(raw)
+    except ValueError:
+        print("❌ Invalid fingerprint size.")
+        return None
 
-    if not encrypted_data:
-        print("❌ No fingerprint data found.")
-        return False
+    if len(live_minutiae) < MIN_MINUTIAE:
+        print("❌ Poor fingerprint quality.")
+        return None
 
-    unlock_code = get_user_unlock_code(username)
-    if not unlock_code:
-        print("❌ Unlock code missing.")
-        return False
+    matches, total1, total2 = compare_minutiae(live_minutiae, stored_minutiae)
+    ratio = matches / max(len(stored_minutiae), 1)
 
-    # === Load fingerprint scan ===
-    fingerprint_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "fingerprints", f"{username}_live.dat"))
-    if not os.path.exists(fingerprint_path):
-        print("❌ Fingerprint scan not found.")
-        return False
+    print(f"[DEBUG] Matches: {matches}, Ratio: {ratio:.3f}")
+    return ratio
 
-    with open(fingerprint_path, "rb") as f:
-        raw = f.read()
+def authenticate_fingerprint_image(username, raw):
+    """Authenticate <username> against an in-memory scan (array, bytes or memoryview)."""
+    print("🔐 Fingerprint Authentication")
 
-    if len(raw) != IMG_WIDTH * IMG_HEIGHT:
-        print("❌ Invalid fingerprint size.")
+    # === Load decoded minutiae (cached; decrypted only on a cache miss) ===
+    context = load_auth_context(username=username, biometric_type="finger")
+    stored_minutiae = None
+    try:
+        if context:
+            stored_minutiae = decode_context_template(
+                context, "finger", lambda data: load_template(Fernet(load_key()).decrypt(data)))
+    except Exception as e:
+        print(f"❌ Decryption failed: {e}")
         return False
 
-    img = np.frombuffer(raw, dtype=np.uint8).reshape((IMG_HEIGHT, IMG_WIDTH))
-    skeleton = preprocess_fingerprint(img)
-    live_minutiae = extract_minutiae(skeleton)
-
-    if len(live_minutiae) < 10:
-        print("❌ Poor fingerprint quality.")
+    if stored_minutiae is None:
+        print("❌ No fingerprint data found.")
         return False
 
-    try:
-        fernet = Fernet(key)
-        stored_minutiae = json.loads(fernet.decrypt(encrypted_data).decode())
-    except Exception as e:
-        print(f"❌ Decryption failed: {e}")
+    unlock_code = context["unlock_code"]
+    if not unlock_code:
+        print("❌ Unlock code missing.")
         return False
 
     # === Matching ===
-    matches, total1, total2 = compare_minutiae(live_minutiae, stored_minutiae)
-    ratio = matches / max(len(stored_minutiae), 1)
-
-    print(f"[DEBUG] Matches: {matches}, Ratio: {ratio:.3f}")
+    ratio = match_scan(raw, stored_minutiae)
 
-    if ratio > 0.70:
+    if ratio is not None and ratio > MATCH_THRESHOLD:
         print("✅ Fingerprint match successful.")
         return True
     else:
         print("❌ Fingerprint mismatch.")
         return False
 
-
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python match_template.py <username>")
+    if sys.argv[2:] != ["-"]:
+        print("Usage: python match_template.py <username> -   (raw scan on stdin)")
         sys.exit(1)
 
-    username = sys.argv[1]
-    success = authenticate_fingerprint(username)
+    raw = sys.stdin.buffer.read()
+    success = bool(raw) and authenticate_fingerprint_image(sys.argv[1], raw)
 
     if success:
         print("AUTH_SUCCESS")
@@ -1,7 +1,30 @@
 import cv2
 import numpy as np
 from skimage.morphology import skeletonize
-from scipy.spatial import distance
+from scipy.spatial import cKDTree
+
+IMG_WIDTH, IMG_HEIGHT = 260, 300
+
+
+def load_fingerprint_image(raw, width=IMG_WIDTH, height=IMG_HEIGHT):
+    """
+    View a raw 8-bit scan as a (height, width) uint8 image without copying.
+    Accepts a NumPy array, bytes, bytearray or memoryview.
+    Raises ValueError if the size does not match the scanner resolution.
+    """
+    if isinstance(raw, np.ndarray):
+        img = raw.astype(np.uint8, copy=False)
+    else:
+        img = np.frombuffer(raw, dtype=np.uint8)
+    if img.size != width * height:
+        raise ValueError(f"expected {width * height} bytes, got {img.size}")
+    return img.reshape((height, width))
+
+
+def minutiae_from_image(raw):
+    """Run the full pipeline on a raw scan and return the minutiae array."""
+    return extract_minutiae_array(preprocess_fingerprint(load_fingerprint_image(raw)))
+
 
 def preprocess_fingerprint(img):
     """Convert grayscale image to binary skeleton."""
@@ -12,32 +35,120 @@ def preprocess_fingerprint(img):
     skeleton = skeletonize(inverted // 255).astype(np.uint8)
     return skeleton
 
+# Minutia type codes used by the array-based helpers, indexed by code
+MINUTIA_TYPES = ("ending", "bifurcation")
+ENDING, BIFURCATION = 0, 1
+
+
+def neighbour_count(skeleton):
+    """Count ridge neighbours in the 3x3 window of every interior pixel."""
+    sk = skeleton.astype(np.int32, copy=False)
+    rows, cols = sk.shape
+    counts = np.zeros((rows - 2, cols - 2), dtype=np.int32)
+    for dy in range(3):
+        for dx in range(3):
+            if dy == 1 and dx == 1:
+                continue
+            counts += sk[dy:dy + rows - 2, dx:dx + cols - 2]
+    return counts
+
+
+def extract_minutiae_array(skeleton):
+    """Detect minutiae as an (n, 3) int32 array of x, y and type code."""
+    if skeleton.shape[0] < 3 or skeleton.shape[1] < 3:
+        return np.empty((0, 3), dtype=np.int32)
+    counts = neighbour_count(skeleton)
+    ridge = skeleton[1:-1, 1:-1] == 1
+    ys, xs = np.nonzero(ridge & ((counts == 1) | (counts == 3)))
+    kinds = np.where(counts[ys, xs] == 1, ENDING, BIFURCATION)
+    # nonzero walks row by row, matching the original y-then-x scan order
+    return np.column_stack((xs + 1, ys + 1, kinds)).astype(np.int32)
+
+
 def extract_minutiae(skeleton):
     """Detect ridge endings and bifurcations in 3x3 windows."""
-    minutiae = []
-    rows, cols = skeleton.shape
-    for y in range(1, rows - 1):
-        for x in range(1, cols - 1):
-            if skeleton[y, x] == 1:
-                neighbors = skeleton[y-1:y+2, x-1:x+2].flatten()
-                count = np.sum(neighbors) - 1
-                if count == 1:
-                    minutiae.append((x, y, "ending"))
-                elif count == 3:
-                    minutiae.append((x, y, "bifurcation"))
-    return minutiae
-
-def compare_minutiae(template1, template2, dist_thresh=10):
-    matches = 0
-    matched_indices = set()
-    for x1, y1, type1 in template1:
-        for i, (x2, y2, type2) in enumerate(template2):
-            if i in matched_indices:
+    return [(x, y, MINUTIA_TYPES[kind])
+            for x, y, kind in extract_minutiae_array(skeleton).tolist()]
+
+def as_minutiae_array(template):
+    """Convert a list of (x, y, type) minutiae into an (n, 3) int32 array."""
+    if isinstance(template, np.ndarray) and template.dtype.names:
+        # Structured records from template_format
+        return np.column_stack((template["x"], template["y"], template["type"])).astype(np.int32)
+    if isinstance(template, np.ndarray):
+        return template.astype(np.int32, copy=False).reshape(-1, 3)
+    return np.array([(x, y, MINUTIA_TYPES.index(kind)) for x, y, kind in template],
+                    dtype=np.int32).reshape(-1, 3)
+
+
+class MinutiaeIndex:
+    """KD-trees over a stored template, one per minutia type, built once."""
+
+    def __init__(self, template):
+        self.points = as_minutiae_array(template)
+        self.trees = {}
+        for kind in np.unique(self.points[:, 2]):
+            members = np.flatnonzero(self.points[:, 2] == kind)
+            self.trees[int(kind)] = (cKDTree(self.points[members, :2]), members)
+
+    def __len__(self):
+        return len(self.points)
+
+    def match(self, live, dist_thresh=10, greedy=True):
+        """
+        Count one-to-one matches between live minutiae and the stored template.
+        greedy=True reproduces the original scan: each live minutia takes the
+        first unmatched stored minutia of its type closer than dist_thresh.
+        greedy=False pairs minutiae globally by increasing distance instead.
+        Returns (matches, len(live), len(stored)).
+        """
+        live = as_minutiae_array(live)
+        matches = 0
+        for kind, (tree, members) in self.trees.items():
+            pts = live[live[:, 2] == kind, :2]
+            if len(pts) == 0:
                 continue
-            if type1 == type2:
-                dist = distance.euclidean((x1, y1), (x2, y2))
-                if dist < dist_thresh:
-                    matched_indices.add(i)
-                    matches += 1
-                    break
-    return matches, len(template1), len(template2)
+            if greedy:
+                matches += self._match_greedy(tree, pts, dist_thresh)
+            else:
+                matches += self._match_nearest(tree, pts, dist_thresh)
+        return matches, len(live), len(self.points)
+
+    @staticmethod
+    def _match_greedy(tree, pts, dist_thresh):
+        # Minutiae of different types never compete, so scanning each type
+        # separately in live order gives the same result as the full scan.
+        matched = np.zeros(tree.n, dtype=bool)
+        matches = 0
+        for point, candidates in zip(pts, tree.query_ball_point(pts, dist_thresh)):
+            if not candidates:
+                continue
+            candidates = np.sort(np.asarray(candidates))
+            dists = np.hypot(*(tree.data[candidates] - point).T)
+            free = candidates[(dists < dist_thresh) & ~matched[candidates]]
+            if len(free):
+                matched[free[0]] = True
+                matches += 1
+        return matches
+
+    @staticmethod
+    def _match_nearest(tree, pts, dist_thresh):
+        k = min(4, tree.n)
+        dists, idx = tree.query(pts, k=k, distance_upper_bound=dist_thresh)
+        dists = dists.reshape(len(pts), k)
+        idx = idx.reshape(len(pts), k)
+        live_idx, rank = np.nonzero(dists < dist_thresh)
+        order = np.argsort(dists[live_idx, rank], kind="stable")
+        used_live, used_stored = set(), set()
+        for i in order:
+            a, b = live_idx[i], idx[live_idx[i], rank[i]]
+            if a in used_live or b in used_stored:
+                continue
+            used_live.add(a)
+            used_stored.add(b)
+        return len(used_live)
+
+
+def compare_minutiae(template1, template2, dist_thresh=10, greedy=True):
+    """Match live minutiae (template1) against a stored template (template2)."""
+    return MinutiaeIndex(template2).match(template1, dist_thresh, greedy)
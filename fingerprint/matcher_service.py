@@ -0,0 +1,170 @@
+"""
+Long-lived fingerprint matcher.
+
+Keeps cv2, scikit-image, scipy, cryptography and the MySQL connection loaded
+so a login only costs one local socket round trip instead of a cold Python
+start. The GUI talks to it through request(); when the service is not
+running (or AF_UNIX is unavailable, e.g. on Windows) request() returns None
+and the caller falls back to running the scripts as subprocesses.
+
+Run with: python fingerprint/matcher_service.py
+"""
+import base64
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+_UID = os.getuid() if hasattr(os, "getuid") else 0
+SOCKET_PATH = os.path.join(tempfile.gettempdir(), f"redactedvault-matcher-{_UID}.sock")
+REQUEST_TIMEOUT = 60  # seconds; authentication itself runs well under this
+GALLERY_MAX_AGE = 300  # seconds before identification reloads templates
+
+FINGERPRINT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(FINGERPRINT_DIR)
+
+
+def is_supported():
+    return hasattr(socket, "AF_UNIX")
+
+
+def request(op, timeout=REQUEST_TIMEOUT, **params):
+    """
+    Send one operation to the running service. A raw scan can be passed as
+    image=<bytes>; it is sent inline so nothing touches the filesystem.
+    Returns the reply dict, or None if the service is not reachable.
+    """
+    if not is_supported() or not os.path.exists(SOCKET_PATH):
+        return None
+    if params.get("image") is not None:
+        params["image"] = base64.b64encode(params["image"]).decode()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(SOCKET_PATH)
+            sock.sendall(json.dumps({"op": op, **params}).encode() + b"\n")
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+        return json.loads(line) if line else None
+    except (OSError, ValueError) as e:
+        print(f"Matcher service unavailable: {e}")
+        return None
+
+
+def start_service():
+    """Start the service in the background if it is not already running."""
+    if not is_supported() or request("ping", timeout=1):
+        return
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+
+
+def _load_matcher():
+    """Import 'match template.py', whose file name is not a valid module name."""
+    spec = importlib.util.spec_from_file_location(
+        "match_template", os.path.join(FINGERPRINT_DIR, "match template.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def serve(path=SOCKET_PATH):
+    """Accept requests one at a time until killed."""
+    for p in (FINGERPRINT_DIR, ROOT_DIR):
+        if p not in sys.path:
+            sys.path.insert(0, p)
+
+    matcher = _load_matcher()
+    import store_template
+    import identify
+    from db.db_manager import connection, get_template_cache_stats, get_pool_stats
+
+    def scan_of(req):
+        """The inline scan of a request; a missing or empty one is refused, never read from disk."""
+        raw = base64.b64decode(req["image"]) if "image" in req else b""
+        if not raw:
+            raise ValueError("request carries no fingerprint image")
+        return raw
+
+    def authenticate(req):
+        return matcher.authenticate_fingerprint_image(req["username"], scan_of(req))
+
+    gallery = None
+
+    def enroll(req):
+        nonlocal gallery
+        raw = scan_of(req)
+        gallery = None  # a new template must be visible to identification
+        return store_template.enroll_fingerprint_image(req["username"], req["unlock_code"], raw)
+
+    def identify_scan(req):
+        nonlocal gallery
+        if gallery is None or time.monotonic() - gallery.loaded_at > GALLERY_MAX_AGE:
+            gallery = identify.load_gallery()
+        result = identify.identify_fingerprint_image(scan_of(req), gallery)
+        if not result:
+            return False
+        return {"ok": True, "user_id": result[0], "username": result[1], "ratio": result[2]}
+
+    handlers = {
+        "ping": lambda req: True,
+        "authenticate": authenticate,
+        "enroll": enroll,
+        "identify": identify_scan,
+        "cache_stats": lambda req: {"ok": True, **get_template_cache_stats()},
+        "pool_stats": lambda req: {"ok": True, **get_pool_stats()},
+    }
+
+    # Open a pooled connection up front so the first login does not pay for it
+    try:
+        with connection():
+            pass
+    except Exception as e:
+        print(f"Starting without a database connection: {e}")
+
+    if os.path.exists(path):
+        os.remove(path)
+    old_umask = os.umask(0o177)  # socket readable by this user only
+    try:
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    server.listen()
+    print(f"Matcher service listening on {path}")
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                try:
+                    with conn.makefile("rb") as reader:
+                        req = json.loads(reader.readline())
+                    handler = handlers.get(req.get("op"))
+                    if handler is None:
+                        reply = {"ok": False, "error": f"unknown op {req.get('op')!r}"}
+                    else:
+                        result = handler(req)
+                        reply = result if isinstance(result, dict) else {"ok": bool(result)}
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e)}
+                try:
+                    conn.sendall(json.dumps(reply).encode() + b"\n")
+                except OSError:
+                    pass
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    serve()
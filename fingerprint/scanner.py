@@ -0,0 +1,44 @@
+"""
+Fingerprint capture through the SecuGen capture tool.
+
+The tool writes the raw image to fingerprints/<name>.dat next to this
+module. capture_scan() clears any earlier file first, so a stale scan can
+never be picked up. It then reads the new one into memory and deletes it
+at once, and everything after capture works on the bytes.
+"""
+import os
+import subprocess
+
+FINGERPRINT_DIR = os.path.dirname(os.path.abspath(__file__))
+CAPTURE_EXE = os.path.join(FINGERPRINT_DIR, "capture", "CaptureFingerprint", "x64", "Debug", "CaptureFingerprint.exe")
+SCAN_DIR = os.path.join(FINGERPRINT_DIR, "fingerprints")
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def capture_scan(name):
+    """
+    Capture one scan and return its raw bytes. Raises
+    subprocess.CalledProcessError if the tool fails and ValueError if it
+    produced no image.
+    """
+    scan_path = os.path.join(SCAN_DIR, f"{name}.dat")
+    _remove(scan_path)
+    try:
+        subprocess.run([CAPTURE_EXE, name], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            with open(scan_path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            raw = b""
+    finally:
+        _remove(scan_path)
+    if not raw:
+        raise ValueError("the scanner returned an empty image")
+    return raw
@@ -1,9 +1,8 @@
 import sys
 import os
-import json
-import numpy as np
 from cryptography.fernet import Fernet
-from match_utils import preprocess_fingerprint, extract_minutiae
+from match_utils import minutiae_from_image
+from template_format import encode_template
 from db.db_manager import register_user_to_database
 
 def generate_aes_key():
@@ -22,36 +21,20 @@ def load_key():
     with open("secret.key", "rb") as f:
         return f.read()
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python store_template.py <username> <unlock_code>")
-        sys.exit(1)
-
-    username = sys.argv[1]
-    unlock_code = sys.argv[2]
-
-    IMG_WIDTH, IMG_HEIGHT = 260, 300
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    fingerprint_path = os.path.join(base_dir, "fingerprints", f"{username}.dat")
-
-    if not os.path.exists(fingerprint_path):
-        print(f"[ERROR] Fingerprint file not found: {fingerprint_path}")
-        sys.exit(1)
-
-    with open(fingerprint_path, "rb") as f:
-        raw_data = f.read()
-
-    img = np.frombuffer(raw_data, dtype=np.uint8).reshape((IMG_HEIGHT, IMG_WIDTH))
-    skeleton = preprocess_fingerprint(img)
-    minutiae = extract_minutiae(skeleton)
+def enroll_fingerprint_image(username, unlock_code, raw):
+    """Extract, encrypt and store the minutiae of an in-memory scan. Returns True on success."""
+    try:
+        minutiae = minutiae_from_image(raw)
+    except ValueError as e:
+        print(f"[ERROR] Invalid fingerprint image: {e}")
+        return False
 
     # Encrypt minutiae
     generate_key_if_missing()
     key = load_key()
     fernet = Fernet(key)
 
-    minutiae_json = json.dumps(minutiae)
-    encrypted_data = fernet.encrypt(minutiae_json.encode())
+    encrypted_data = fernet.encrypt(encode_template(minutiae))
 
     # Generate and encrypt AES key
     aes_key = generate_aes_key()
@@ -67,6 +50,19 @@ def main():
     )
 
     print(f"[SUCCESS] Fingerprint registered for '{username}'.")
+    return True
+
+def main():
+    if sys.argv[3:] != ["-"] or len(sys.argv) != 4:
+        print("Usage: python store_template.py <username> <unlock_code> -   (raw scan on stdin)")
+        sys.exit(1)
+
+    raw = sys.stdin.buffer.read()
+    if not raw:
+        print("[ERROR] Empty fingerprint image.")
+        sys.exit(1)
+    if not enroll_fingerprint_image(sys.argv[1], sys.argv[2], raw):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,114 @@
+"""
+Binary minutiae template format.
+
+Layout (little-endian), encrypted with Fernet like the old JSON templates:
+
+    header  4s magic b"RVMT" | B version | B record size | I count
+    record  H x | H y | B type | B angle | B quality | B reserved
+
+type uses the codes in match_utils.MINUTIA_TYPES. angle is in steps of
+2*pi/240 with ANGLE_UNKNOWN for "not measured"; quality 0 means unknown.
+Records decode straight into a NumPy structured array with np.frombuffer.
+
+Run with: python fingerprint/template_format.py migrate [path/to/secret.key]
+to rewrite legacy JSON templates in the biometric_data table in place.
+The key defaults to the vault's gui/secret.key, wherever this is run from.
+"""
+import os
+import sys
+import json
+import struct
+import numpy as np
+from match_utils import as_minutiae_array
+
+MAGIC = b"RVMT"
+VERSION = 1
+HEADER = struct.Struct("<4sBBI")
+ANGLE_STEPS = 240
+ANGLE_UNKNOWN = 0xFF
+
+DEFAULT_KEY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gui", "secret.key")
+
+MINUTIA_DTYPE = np.dtype([
+    ("x", "<u2"),
+    ("y", "<u2"),
+    ("type", "u1"),
+    ("angle", "u1"),
+    ("quality", "u1"),
+    ("reserved", "u1"),
+])
+
+
+def is_binary_template(data):
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def to_records(minutiae, angles=None, quality=None):
+    """Build the structured array for minutiae given as (x, y, type) tuples or an (n, 3) array."""
+    points = as_minutiae_array(minutiae)
+    records = np.zeros(len(points), dtype=MINUTIA_DTYPE)
+    records["x"] = points[:, 0]
+    records["y"] = points[:, 1]
+    records["type"] = points[:, 2]
+    records["angle"] = ANGLE_UNKNOWN if angles is None else angles
+    if quality is not None:
+        records["quality"] = quality
+    return records
+
+
+def encode_template(minutiae, angles=None, quality=None):
+    """Pack minutiae into template bytes."""
+    records = to_records(minutiae, angles, quality)
+    return HEADER.pack(MAGIC, VERSION, MINUTIA_DTYPE.itemsize, len(records)) + records.tobytes()
+
+
+def decode_template(data):
+    """Decode template bytes into a structured array (a view, no copy)."""
+    magic, version, record_size, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a binary minutiae template")
+    if version != VERSION or record_size != MINUTIA_DTYPE.itemsize:
+        raise ValueError(f"unsupported template version {version}")
+    return np.frombuffer(data, dtype=MINUTIA_DTYPE, count=count, offset=HEADER.size)
+
+
+def load_template(data):
+    """Decode a decrypted template in either the binary or the legacy JSON format."""
+    if is_binary_template(data):
+        return decode_template(data)
+    # Legacy: [[x, y, "ending"], ...]
+    return to_records(json.loads(bytes(data).decode()))
+
+
+def migrate_templates(key):
+    """Rewrite every legacy JSON finger template as a binary one. Returns rows updated."""
+    from cryptography.fernet import Fernet
+    from db.db_manager import fetch_biometric_rows, update_biometric_rows
+
+    fernet = Fernet(key)
+    updates = []
+    for row_id, encrypted_data in fetch_biometric_rows("finger"):
+        try:
+            plain = fernet.decrypt(encrypted_data)
+        except Exception as e:
+            print(f"❌ Skipping row {row_id}: {e}")
+            continue
+        if is_binary_template(plain):
+            continue
+        updates.append((fernet.encrypt(encode_template(json.loads(plain.decode()))), row_id))
+
+    if updates and not update_biometric_rows(updates):
+        return 0
+    return len(updates)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3) or sys.argv[1] != "migrate":
+        print("Usage: python fingerprint/template_format.py migrate [path/to/secret.key]")
+        sys.exit(1)
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    key_path = sys.argv[2] if len(sys.argv) == 3 else DEFAULT_KEY_PATH
+    with open(key_path, "rb") as key_file:
+        migrated = migrate_templates(key_file.read())
+    print(f"[SUCCESS] Migrated {migrated} fingerprint template(s).")
@@ -3,6 +3,9 @@ from tkinter import ttk, messagebox
 from db.db_manager import get_user_id, set_current_user
 from face_authentication.face_auth import authenticate_face
 from gui.vault import create_vault_ui
+from fingerprint import matcher_service
+from fingerprint.scanner import capture_scan
+from gui.db_async import TkDBRunner
 import subprocess
 import sys
 import os
@@ -14,12 +17,15 @@ GOLD = "#DAA520"  # Highlight color
 HOVER = "#FF4500"  # Hover color
 BORDER = "#333333"  # Border color
 
+DB_TIMEOUT = 15  # seconds
+
 
 def validate_code_input(char):
     return char in "0123456789+-/*="
 
 
-def create_auth_window(passed_username):
+def create_auth_window(passed_username, auth_context=None):
+    """auth_context: optional result of load_auth_context for passed_username."""
     root = tk.Tk()
     root.title("Agent Authentication")
     root.geometry("500x600")  # Slightly smaller window for login
@@ -46,7 +52,10 @@ def create_auth_window(passed_username):
                               insertbackground=TEXT, bd=0,
                               highlightthickness=1,
                               highlightcolor=BORDER)
-    username_entry.pack(fill="x", padx=20, pady=(5, 15), ipady=5)
+    username_entry.pack(fill="x", padx=20, pady=(5, 0), ipady=5)
+
+    tk.Label(content, text="Leave blank to sign in as the unlock code's agent",
+             bg=BG, fg=BORDER, font=("Terminal", 9)).pack(anchor="w", padx=20, pady=(2, 10))
 
 
     # Biometric selection
@@ -72,7 +81,31 @@ def create_auth_window(passed_username):
     )
     finger_btn.pack(side="left", padx=10)
 
+    db = TkDBRunner(root)
+
     # Authentication button
+    def open_vault(username, user_id):
+        if not user_id:
+            messagebox.showerror("Error", f"Unknown agent: {username}")
+            return
+        set_current_user(username, user_id)
+        messagebox.showinfo("Success", f"Welcome back, {username}!")
+
+        root.destroy()
+
+        vault_root = tk.Tk()
+        create_vault_ui(vault_root)
+        vault_root.mainloop()
+
+    def finish_login(username):
+        # The context loaded with the unlock code already carries the id
+        if auth_context and auth_context["username"] == username:
+            open_vault(username, auth_context["user_id"])
+            return
+        db.submit(get_user_id, username, timeout=DB_TIMEOUT,
+                  on_done=lambda user_id: open_vault(username, user_id),
+                  on_error=lambda e: messagebox.showerror("Error", f"Database error: {e}"))
+
     def on_auth():
         entered_username = username_entry.get().strip()
         method = bio_var.get()
@@ -80,62 +113,48 @@ def create_auth_window(passed_username):
             messagebox.showerror("Error", "Please select a biometric authentication method.")
             return
 
-        if entered_username != passed_username:
+        if entered_username and entered_username != passed_username:
             messagebox.showerror("Error", "Entered username does not match the unlock code.")
             return
 
+        # The unlock code already picked the account, so a blank codename only
+        # saves typing it; the scan is matched 1:1 against that user's template
+        entered_username = passed_username
+
         if method == "face":
-            success = authenticate_face(entered_username)
+            success = authenticate_face(passed_username, auth_context)
             if success:
-                user_id = get_user_id(entered_username)
-                if user_id:
-                    set_current_user(entered_username, user_id)
-                    messagebox.showinfo("Success", f"Welcome back, {entered_username}!")
-
-                    root.destroy()
-
-                    vault_root = tk.Tk()
-                    create_vault_ui(vault_root)
-                    vault_root.mainloop()
+                finish_login(entered_username)
             else:
                 messagebox.showerror("Failed", "Authentication failed.")
         else:
             try:
-                # Step 1: Capture fingerprint
-                capture_exe = os.path.abspath(
-                    "../fingerprint/capture/CaptureFingerprint/x64/Debug/CaptureFingerprint.exe"
-                )
+                # Step 1: Capture fingerprint (an empty scan is refused here)
                 try:
-                    subprocess.run(
-                        [capture_exe, entered_username + "_live"],
-                        check=True,
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL
-                    )
+                    scan = capture_scan(passed_username + "_live")
                 except Exception as e:
                     messagebox.showerror("Capture Error", f"Failed to capture fingerprint: {e}")
                     return
 
-                # Step 2: Match fingerprint
-                match_script = os.path.abspath("../fingerprint/match template.py")
-                result = subprocess.run(
-                    [sys.executable, match_script, entered_username],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE
-                )
-
-                output = result.stdout.decode(errors="ignore").strip()
-                print("[MATCH OUTPUT]:", output)
-
-                if "AUTH_SUCCESS" in output:
-                    user_id = get_user_id(entered_username)
-                    if user_id:
-                        set_current_user(entered_username, user_id)
-                        messagebox.showinfo("Success", f"Welcome back, {entered_username}!")
-                        root.destroy()
-                        vault_root = tk.Tk()
-                        create_vault_ui(vault_root)
-                        vault_root.mainloop()
+                # Step 2: Match fingerprint 1:1 (warm service first, script as fallback)
+                reply = matcher_service.request("authenticate", username=entered_username, image=scan)
+                matched = reply.get("ok", False) if reply is not None else None
+
+                if matched is None:
+                    match_script = os.path.abspath("../fingerprint/match template.py")
+                    result = subprocess.run(
+                        [sys.executable, match_script, entered_username, "-"],
+                        input=scan,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE
+                    )
+
+                    output = result.stdout.decode(errors="ignore").strip()
+                    print("[MATCH OUTPUT]:", output)
+                    matched = "AUTH_SUCCESS" in output
+
+                if matched:
+                    finish_login(entered_username)
                 else:
                     messagebox.showerror("Failed", "Fingerprint match failed.")
             except Exception as e:
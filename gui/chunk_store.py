@@ -0,0 +1,440 @@
+"""
+Content-addressed, deduplicating chunk store under .vault_hidden/chunks.
+
+Files are cut into fixed-size plaintext chunks. Each chunk is named by
+HMAC-SHA256(key, plaintext), so identical chunks are stored once and a
+name reveals nothing about the content without the vault key. Every
+chunk is its own AES-256-GCM object:
+
+    4s magic b"RVCO" | B version | B codec | 12s nonce | ciphertext + 16-byte tag
+
+authenticated against its header and name, so objects cannot be swapped.
+The plaintext is compressed first when the file's codec (see
+gui/compression.py) makes the chunk smaller; the header byte says which.
+
+Objects up to PACK_MAX_OBJECT bytes are appended to pack segments
+(chunks/packs/pack-NNNNNN.seg) instead of getting a file each; their
+(pack, offset, length) lives in vault_chunks. Larger objects stay loose
+files. Segments are append-only; compact() copies the live objects out
+of mostly-dead segments and renames them *.retired. read_chunk() falls
+back to the retired name, and once that is removed too (on the next pass)
+it looks the chunk's current location up again, so a reader holding an
+old location still finds its bytes.
+
+Which files use which chunks lives in the DB (file_chunks), and
+vault_chunks counts the references to each chunk. Chunk files are only
+placed or unlinked under the store lock, around the DB transaction that
+makes them live or dead. An import pins the existing chunks it decided
+to reuse until it commits, so a concurrent delete never unlinks them.
+Files prepared together share a ChunkBatch, so a chunk new to the store
+is compressed, encrypted and written once however many of them hold it.
+"""
+import glob
+import hashlib
+import hmac
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import uuid
+from collections import Counter
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from db.db_manager import (
+    get_packed_chunk_ids, get_chunk_location, get_pack_usage, get_pack_entries, move_packed_chunks
+)
+from gui.compression import choose_codec_for_path, compress, decompress
+from gui.vault_crypto import DEFAULT_CHUNK_SIZE, DEFAULT_WORKERS, ordered_map, read_chunks, derive_key
+
+MAGIC = b"RVCO"
+VERSION = 1
+HEADER = struct.Struct("<4sBB12s")
+
+CHUNK_REF_PREFIX = "chunks:"  # files.filepath of a file kept in the chunk store
+
+PACK_MAX_OBJECT = 256 * 1024          # sealed objects up to this size go into packs
+PACK_SEGMENT_SIZE = 64 * 1024 * 1024  # start a new segment past this size
+COMPACT_DEAD_RATIO = 0.5              # rewrite segments that are at least this much garbage
+
+
+def is_chunked_ref(filepath):
+    return filepath.startswith(CHUNK_REF_PREFIX)
+
+
+def new_chunked_ref():
+    return CHUNK_REF_PREFIX + str(uuid.uuid4())
+
+
+class PreparedFile:
+    """A file whose chunks are named and, where new, encrypted into its batch."""
+
+    def __init__(self, name, ref, batch):
+        self.name = name
+        self.ref = ref
+        self.batch = batch
+        self.chunks = []  # (chunk_id, plaintext size) in file order
+        self.new = []     # chunks sealed into the batch, for this file or another in it
+        self.pinned = []  # existing chunks reused by this file, held until commit
+        self.size = 0     # plaintext bytes read
+        self.written = 0  # bytes of new chunk objects stored by commit() for this file
+
+
+class ChunkBatch:
+    """
+    Chunks new to the store, sealed for files that are committed together.
+    Each chunk id is sealed by the first file that meets it; the others wait
+    for that object instead of compressing and encrypting it again.
+    """
+
+    def __init__(self):
+        self.objects = {}   # chunk_id -> sealed bytes (for a pack) or (staging path, length)
+        self._sealing = {}  # chunk_id -> Event set once its object is in (or its sealing failed)
+        self._lock = threading.Lock()
+
+    def seal_once(self, chunk_id, seal):
+        """Run seal() for chunk_id unless another file already has or is doing it."""
+        while True:
+            with self._lock:
+                if chunk_id in self.objects:
+                    return
+                sealing = self._sealing.get(chunk_id)
+                if sealing is None:
+                    self._sealing[chunk_id] = threading.Event()
+            if sealing is None:
+                break
+            sealing.wait()  # if that file failed, the loop takes the chunk over
+
+        try:
+            sealed = seal()
+            with self._lock:
+                self.objects[chunk_id] = sealed
+        finally:
+            with self._lock:
+                self._sealing.pop(chunk_id).set()
+
+    def close(self):
+        """Remove the staged objects that commit() did not move into the store."""
+        with self._lock:
+            objects, self.objects = self.objects, {}
+        for sealed in objects.values():
+            if not isinstance(sealed, bytes) and os.path.exists(sealed[0]):
+                os.remove(sealed[0])
+
+
+class ChunkStore:
+    def __init__(self, root, fernet_key, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.root = os.path.join(root, "chunks")
+        self.staging = os.path.join(root, "chunks", ".staging")
+        self.packs = os.path.join(root, "chunks", "packs")
+        self.chunk_size = chunk_size
+        self._aes = AESGCM(derive_key(fernet_key, b"RedactedVault chunk store v1"))
+        self._mac_key = derive_key(fernet_key, b"RedactedVault chunk id v1")
+        self._lock = threading.Lock()
+        self._pins = Counter()  # chunk_id -> imports in flight that reuse it
+        self._packed = set()    # ids of chunks stored in packs, see load_pack_index
+        self._index_loaded = False
+        self._orphaned = {}     # pinned packed chunk -> location, freed by a delete meanwhile
+
+        # Anything left in staging belongs to an import that never committed
+        shutil.rmtree(self.staging, ignore_errors=True)
+        os.makedirs(self.staging, exist_ok=True)
+        os.makedirs(self.packs, exist_ok=True)
+
+        existing = [self._pack_number(path) for path in glob.glob(os.path.join(self.packs, "pack-*.seg"))]
+        self._active_pack = max(existing, default=1)
+
+    @staticmethod
+    def _pack_number(path):
+        return int(os.path.basename(path)[len("pack-"):-len(".seg")])
+
+    def pack_path(self, pack_id):
+        return os.path.join(self.packs, f"pack-{pack_id:06d}.seg")
+
+    def retired_path(self, pack_id):
+        return os.path.join(self.packs, f"pack-{pack_id:06d}.retired")
+
+    def load_pack_index(self):
+        """Load the ids of packed chunks so imports can dedupe against them (runs in the background)."""
+        # Under the lock, so a delete cannot free a chunk between the query and the update
+        with self._lock:
+            ids = get_packed_chunk_ids()
+            if ids is not None:
+                self._packed.update(ids)
+                self._index_loaded = True
+
+    def chunk_id(self, data):
+        return hmac.new(self._mac_key, data, hashlib.sha256).hexdigest()
+
+    def path(self, chunk_id):
+        return os.path.join(self.root, chunk_id[:2], chunk_id[2:])
+
+    def has(self, chunk_id):
+        """Whether the store holds chunk_id; call with the store lock held."""
+        if chunk_id in self._packed or os.path.exists(self.path(chunk_id)):
+            return True
+        if self._index_loaded:
+            return False
+        # Until load_pack_index has run, ask the DB whether a pack holds it
+        if get_chunk_location(chunk_id) is None:
+            return False
+        self._packed.add(chunk_id)
+        return True
+
+    def _pin_if_present(self, chunk_id):
+        with self._lock:
+            if not self.has(chunk_id):
+                return False
+            self._pins[chunk_id] += 1
+            return True
+
+    def _unpin(self, prepared):
+        for chunk_id in prepared.pinned:
+            self._pins[chunk_id] -= 1
+            if self._pins[chunk_id] <= 0:
+                del self._pins[chunk_id]
+        prepared.pinned = []
+
+    def _seal(self, chunk_id, data, codec=0, level=0):
+        codec, payload = compress(data, codec, level)
+        header = HEADER.pack(MAGIC, VERSION, codec, os.urandom(12))
+        return header + self._aes.encrypt(header[-12:], payload, header + bytes.fromhex(chunk_id))
+
+    def _open(self, chunk_id, blob):
+        header = blob[:HEADER.size]
+        magic, version, codec, nonce = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"chunk {chunk_id} is not a vault chunk object")
+        return decompress(self._aes.decrypt(nonce, blob[HEADER.size:], header + bytes.fromhex(chunk_id)), codec)
+
+    def prepare_file(self, src_path, workers=DEFAULT_WORKERS, batch=None):
+        """
+        Name every chunk of src_path and compress and encrypt the ones the
+        store lacks into batch (a ChunkBatch shared by the files that will
+        be committed together; a fresh one if None). Large objects are
+        staged on disk, small ones kept in memory for a pack. Chunks already
+        present, or already sealed into the batch, are not encrypted or
+        written again. Nothing is visible until commit().
+        """
+        prepared = PreparedFile(os.path.basename(src_path), new_chunked_ref(), batch or ChunkBatch())
+        codec, level = choose_codec_for_path(src_path)
+
+        def seal(chunk_id, data):
+            sealed = self._seal(chunk_id, data, codec, level)
+            if len(sealed) <= PACK_MAX_OBJECT:
+                return sealed
+            fd, tmp_path = tempfile.mkstemp(dir=self.staging)
+            with os.fdopen(fd, "wb") as f:
+                f.write(sealed)
+            return tmp_path, len(sealed)
+
+        def stage(item):
+            _, data, _ = item
+            chunk_id = self.chunk_id(data)
+            if self._pin_if_present(chunk_id):
+                return chunk_id, len(data), True
+            prepared.batch.seal_once(chunk_id, lambda: seal(chunk_id, data))
+            return chunk_id, len(data), False
+
+        try:
+            with open(src_path, "rb") as src:
+                for chunk_id, size, pinned in ordered_map(stage, read_chunks(src, self.chunk_size), workers):
+                    prepared.chunks.append((chunk_id, size))
+                    prepared.size += size
+                    (prepared.pinned if pinned else prepared.new).append(chunk_id)
+        except BaseException:
+            # What it sealed stays in the batch for the other files
+            self.discard([prepared])
+            raise
+        return prepared
+
+    def _release_staging(self, prepared_files):
+        for prepared in prepared_files:
+            self._unpin(prepared)
+            prepared.new = []
+
+    def discard(self, prepared_files):
+        """Drop the pins of files that will not be committed (their batch is closed by commit())."""
+        with self._lock:
+            self._release_staging(prepared_files)
+
+    def _append_to_pack(self, objects):
+        """Append sealed objects to the active segment; returns {chunk_id: (pack, offset, length)}."""
+        locations = {}
+        if not objects:
+            return locations
+        active = self.pack_path(self._active_pack)
+        if os.path.exists(active) and os.path.getsize(active) >= PACK_SEGMENT_SIZE:
+            self._active_pack += 1
+        with open(self.pack_path(self._active_pack), "ab") as pack:
+            offset = pack.tell()
+            for chunk_id, sealed in objects:
+                pack.write(sealed)
+                locations[chunk_id] = (self._active_pack, offset, len(sealed))
+                offset += len(sealed)
+            pack.flush()
+            os.fsync(pack.fileno())  # one sync per batch instead of one per file
+        return locations
+
+    def commit(self, prepared_files, record):
+        """
+        Move the new chunks of prepared_files out of their batch into the
+        store and run record(locations) (the DB transaction referencing
+        them, given the pack locations of the small objects) under the store
+        lock. Each chunk is stored once, however many files hold it, and
+        counted in the written bytes of the first. The batches are closed
+        afterwards, so every file prepared with a batch must be in this call
+        (or have failed). If record() returns None, loose chunks placed here
+        are removed again; bytes already appended to a pack are left for
+        compaction. Returns record()'s result.
+        """
+        with self._lock:
+            placed = []
+            result = None
+            try:
+                small = {}
+                small_locations = {}
+                for prepared in prepared_files:
+                    prepared.written = 0
+                    for chunk_id in prepared.pinned:
+                        if chunk_id in self._orphaned:
+                            # Deleted while we held it; record its old pack location again
+                            small_locations[chunk_id] = self._orphaned[chunk_id]
+                    for chunk_id in prepared.new:
+                        sealed = prepared.batch.objects[chunk_id]
+                        if isinstance(sealed, bytes):
+                            if chunk_id not in self._packed and chunk_id not in small:
+                                small[chunk_id] = sealed
+                                prepared.written += len(sealed)
+                            continue
+                        final = self.path(chunk_id)
+                        if os.path.exists(final):
+                            continue  # placed for an earlier file; the batch drops this copy
+                        os.makedirs(os.path.dirname(final), exist_ok=True)
+                        os.replace(sealed[0], final)
+                        placed.append(final)
+                        prepared.written += sealed[1]
+                small_locations.update(self._append_to_pack(list(small.items())))
+                result = record(small_locations)
+                if result is not None:
+                    self._packed.update(small_locations)
+                    for chunk_id in small_locations:
+                        self._orphaned.pop(chunk_id, None)
+            finally:
+                self._release_staging(prepared_files)
+                for batch in {id(prepared.batch): prepared.batch for prepared in prepared_files}.values():
+                    batch.close()
+                if result is None:
+                    for final in placed:
+                        os.remove(final)
+            return result
+
+    def delete(self, release):
+        """
+        Run release() (the DB transaction dropping a file's references,
+        returning [(chunk_id, pack_id, pack_offset, pack_length)] for chunks
+        nobody references any more) and unlink those chunks, under the store
+        lock. Packed chunks just become garbage for compact(). Chunks pinned
+        by an import in flight stay where they are; that import records
+        them again. Returns release()'s result.
+        """
+        with self._lock:
+            freed = release()
+            for chunk_id, pack_id, offset, length in freed or ():
+                if chunk_id in self._pins:
+                    if pack_id is not None:
+                        self._orphaned[chunk_id] = (pack_id, offset, length)
+                    continue
+                if pack_id is not None:
+                    self._packed.discard(chunk_id)
+                    continue
+                try:
+                    os.remove(self.path(chunk_id))
+                except FileNotFoundError:
+                    pass
+            return freed
+
+    def _read_packed(self, pack_id, offset, length):
+        """Bytes of a packed object, from its segment or the segment's retired copy; None if both are gone."""
+        for path in (self.pack_path(pack_id), self.retired_path(pack_id)):
+            try:
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    return f.read(length)
+            except FileNotFoundError:
+                continue
+        return None
+
+    def read_chunk(self, chunk):
+        """Plaintext of a chunk given as (chunk_id, size, pack_id, pack_offset, pack_length)."""
+        chunk_id, _, pack_id, offset, length = chunk
+        if pack_id is None:
+            with open(self.path(chunk_id), "rb") as f:
+                return self._open(chunk_id, f.read())
+        blob = self._read_packed(pack_id, offset, length)
+        if blob is None:
+            # Compacted twice since this location was read; ask where it lives now
+            location = get_chunk_location(chunk_id)
+            blob = self._read_packed(*location) if location else None
+            if blob is None:
+                raise FileNotFoundError(f"chunk {chunk_id} is no longer in the store")
+        return self._open(chunk_id, blob)
+
+    def iter_file(self, chunks, workers=DEFAULT_WORKERS):
+        """Yield the plaintext of a file's chunks (as from get_file_chunks) in order."""
+        yield from ordered_map(self.read_chunk, chunks, workers)
+
+    def read_file(self, chunks, dst, workers=DEFAULT_WORKERS):
+        """Write a file's plaintext to dst, a path or a writable binary file object."""
+        if isinstance(dst, (str, bytes, os.PathLike)):
+            with open(dst, "wb") as out:
+                self.read_file(chunks, out, workers)
+            return
+        for plain in self.iter_file(chunks, workers):
+            dst.write(plain)
+
+    def compact(self, dead_ratio=COMPACT_DEAD_RATIO):
+        """
+        Reclaim space in pack segments (runs in the background). Segments
+        retired by the previous pass are removed; then every sealed segment
+        that is at least dead_ratio garbage has its live objects appended to
+        the active segment, their locations moved in the DB, and is renamed
+        *.retired. Returns the number of bytes reclaimed.
+        """
+        for retired in glob.glob(os.path.join(self.packs, "*.retired")):
+            os.remove(retired)
+
+        usage = get_pack_usage()
+        if usage is None:
+            return 0
+        reclaimed = 0
+        for path in sorted(glob.glob(os.path.join(self.packs, "pack-*.seg"))):
+            pack_id = self._pack_number(path)
+            if pack_id == self._active_pack:
+                continue
+            if any(location[0] == pack_id for location in self._orphaned.values()):
+                continue  # holds a chunk an import is about to record again
+            size = os.path.getsize(path)
+            live = usage.get(pack_id, 0)
+            if size == 0 or (size - live) / size < dead_ratio:
+                continue
+
+            # One segment at a time, so imports only wait for a single copy
+            with self._lock:
+                entries = get_pack_entries(pack_id)
+                if entries is None:
+                    continue
+                objects = []
+                with open(path, "rb") as f:
+                    for chunk_id, offset, length in entries:
+                        f.seek(offset)
+                        objects.append((chunk_id, f.read(length)))
+                locations = self._append_to_pack(objects)
+                moves = [(new_pack, new_offset, chunk_id, pack_id)
+                         for chunk_id, (new_pack, new_offset, _) in locations.items()]
+                if not move_packed_chunks(moves):
+                    continue  # the copies become garbage in the active segment
+                os.replace(path, self.retired_path(pack_id))
+            reclaimed += size - live
+        return reclaimed
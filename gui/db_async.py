@@ -0,0 +1,99 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+# Shared by every window; DB calls are I/O bound so a few threads are plenty
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="db")
+
+POLL_MS = 20  # how often finished queries are handed back to the Tk loop
+
+
+class TkDBRunner:
+    """
+    Runs blocking DB calls on a worker pool and delivers results on the Tk
+    thread via root.after. Everything still pending when the window is
+    destroyed is cancelled and its callbacks are dropped.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._done = queue.Queue()
+        self._pending = {}  # future -> (on_done, on_error, deadline)
+        self._closed = False
+        root.bind("<Destroy>", self._on_destroy, add="+")
+        self._poll_id = root.after(POLL_MS, self._poll)
+
+    def submit(self, fn, *args, on_done=None, on_error=None, timeout=None, **kwargs):
+        """
+        Run fn(*args, **kwargs) in the background and return its Future.
+        on_done(result) / on_error(exception) are called on the Tk thread.
+        After timeout seconds on_error gets a TimeoutError instead.
+        """
+        future = _executor.submit(fn, *args, **kwargs)
+        if self._closed:
+            future.cancel()
+            return future
+        deadline = time.monotonic() + timeout if timeout else None
+        self._pending[future] = (on_done, on_error, deadline)
+        future.add_done_callback(self._done.put)
+        return future
+
+    def cancel_all(self):
+        for future in list(self._pending):
+            future.cancel()
+        self._pending.clear()
+
+    def _poll(self):
+        if self._closed:
+            return
+        while True:
+            try:
+                future = self._done.get_nowait()
+            except queue.Empty:
+                break
+            callbacks = self._pending.pop(future, None)
+            if callbacks is None:
+                continue  # timed out or cancelled already
+            on_done, on_error, _ = callbacks
+            try:
+                result = future.result()
+            except CancelledError:
+                continue
+            except Exception as e:
+                self._report(on_error, e)
+                if self._closed:
+                    return
+                continue
+            if on_done:
+                on_done(result)
+            if self._closed:
+                return  # the callback destroyed the window
+
+        now = time.monotonic()
+        for future, (_, on_error, deadline) in list(self._pending.items()):
+            if deadline is not None and now > deadline:
+                del self._pending[future]
+                future.cancel()  # only stops it if it has not started yet
+                self._report(on_error, TimeoutError("database did not respond in time"))
+                if self._closed:
+                    return
+
+        self._poll_id = self.root.after(POLL_MS, self._poll)
+
+    @staticmethod
+    def _report(on_error, error):
+        if on_error:
+            on_error(error)
+        else:
+            print(f"Background DB call failed: {error}")
+
+    def _on_destroy(self, event):
+        # <Destroy> fires for every child widget too; only react to the window itself
+        if event.widget is not self.root or self._closed:
+            return
+        self._closed = True
+        self.cancel_all()
+        try:
+            self.root.after_cancel(self._poll_id)
+        except Exception:
+            pass
@@ -1,11 +1,16 @@
 import tkinter as tk
 from tkinter import messagebox
-from db.db_manager import get_username_by_unlock_code
+from db.db_manager import load_auth_context, get_unlock_index
 from gui.authenticate_window import create_auth_window
 from gui.register_window import create_registration_window
+from fingerprint import matcher_service
+from gui.db_async import TkDBRunner
+from db.schema import upgrade_schema
 
 # Constants
 SECRET_TRIGGER = "0000+-"
+DB_TIMEOUT = 15  # seconds
+UNLOCK_INDEX_RETRY_MS = 30000
 expression = ""
 
 # Colors
@@ -30,6 +35,13 @@ class SmartCalcVault(tk.Tk):
 
         self.equation = ""
 
+        # Unlock codes load in the background; the calculator works meanwhile
+        self.db = TkDBRunner(self)
+        self.unlock_index = None
+        # Bring an older database up to the current schema before the first lookup
+        self.db.submit(upgrade_schema, on_done=lambda _: self.load_unlock_index(),
+                       on_error=lambda e: self.load_unlock_index())
+
         container = tk.Frame(self, bg=BG)
         container.pack(fill="both", expand=True, padx=10, pady=10)
 
@@ -94,15 +106,31 @@ class SmartCalcVault(tk.Tk):
             create_registration_window(self)
             self.equation = ""
             self.update_display()
-        elif len(self.equation) >= 6:
-            username = get_username_by_unlock_code(self.equation)
-            if username:
-                self.destroy()
-                create_auth_window(username)
-            else:
-                messagebox.showerror("Error", "Invalid unlock code.")
+        elif self.unlock_index is not None:
+            # Checked against the local index; only a hit queries MySQL
+            code = self.unlock_index.match_suffix(self.equation)
+            if code:
+                self.db.submit(load_auth_context, unlock_code=code,
+                               on_done=self.open_auth_window, timeout=DB_TIMEOUT,
+                               on_error=lambda e: print(f"Error loading user: {e}"))
+
+    def load_unlock_index(self):
+        def on_loaded(index):
+            self.unlock_index = index
+            if not len(index):
+                # Nothing loaded (DB down or no users yet); retry later
+                self.after(UNLOCK_INDEX_RETRY_MS, self.load_unlock_index)
+
+        self.db.submit(get_unlock_index, on_done=on_loaded, timeout=DB_TIMEOUT,
+                       on_error=lambda e: print(f"Error loading unlock codes: {e}"))
+
+    def open_auth_window(self, context):
+        if not context:
             self.equation = ""
             self.update_display()
+            return
+        self.destroy()
+        create_auth_window(context["username"], context)
 
     def update_display(self):
         self.display.delete(0, tk.END)
@@ -127,5 +155,6 @@ class SmartCalcVault(tk.Tk):
 
 
 if __name__ == "__main__":
+    matcher_service.start_service()  # warm up fingerprint matching in the background
     app = SmartCalcVault()
     app.mainloop()
@@ -0,0 +1,117 @@
+import bisect
+
+
+class FileListModel:
+    """
+    Client-side copy of the vault's file list, keyed by file id and kept in
+    display order (newest first, by date_added then id).
+
+    Every change is reported to listeners as a single-row diff
+
+        listener(op, index, record)   op in "insert", "remove", "update", "reset", "load"
+
+    where index is the row's display position (before removal, after
+    insertion) so views can patch one row instead of rebuilding. "reset"
+    (list replaced) and "load" (a page of rows added by extend) pass index
+    None and record None.
+    """
+
+    def __init__(self, records=()):
+        self._records = {}  # file_id -> record dict
+        self._keys = []     # sort keys, ascending; display order is reversed
+        self._listeners = []
+        for record in records:
+            self._add(record)
+
+    @staticmethod
+    def _sort_key(record):
+        return (record["date_added"], record["id"])
+
+    def _display_index(self, pos):
+        return len(self._keys) - 1 - pos
+
+    def _add(self, record):
+        self._records[record["id"]] = record
+        pos = bisect.bisect_left(self._keys, self._sort_key(record))
+        self._keys.insert(pos, self._sort_key(record))
+        return self._display_index(pos)
+
+    def _discard(self, record):
+        pos = bisect.bisect_left(self._keys, self._sort_key(record))
+        index = self._display_index(pos)
+        del self._keys[pos]
+        del self._records[record["id"]]
+        return index
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, op, index, record):
+        for listener in self._listeners:
+            listener(op, index, record)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, index):
+        """Record at display position index."""
+        if index < 0:
+            index += len(self._keys)
+        _, file_id = self._keys[len(self._keys) - 1 - index]
+        return self._records[file_id]
+
+    def __contains__(self, file_id):
+        return file_id in self._records
+
+    def get(self, file_id):
+        return self._records.get(file_id)
+
+    def index_of(self, file_id):
+        record = self._records.get(file_id)
+        if record is None:
+            return None
+        return self._display_index(bisect.bisect_left(self._keys, self._sort_key(record)))
+
+    def reset(self, records):
+        """Replace the whole list (initial load)."""
+        self._records.clear()
+        self._keys.clear()
+        for record in records:
+            self._add(record)
+        self._notify("reset", None, None)
+
+    def extend(self, records):
+        """Add a page of records with a single notification."""
+        for record in records:
+            if record["id"] not in self._records:
+                self._add(record)
+        self._notify("load", None, None)
+
+    def insert(self, record):
+        """Add a record, or update it if its id is already present."""
+        if record["id"] in self._records:
+            self.update(record["id"], **record)
+            return
+        index = self._add(record)
+        self._notify("insert", index, record)
+
+    def remove(self, file_id):
+        record = self._records.get(file_id)
+        if record is None:
+            return None
+        index = self._discard(record)
+        self._notify("remove", index, record)
+        return record
+
+    def update(self, file_id, **changes):
+        """Change fields of a record; a changed sort key moves it as remove + insert."""
+        record = self._records.get(file_id)
+        if record is None:
+            return
+        updated = dict(record, **changes)
+        if self._sort_key(updated) != self._sort_key(record):
+            self.remove(file_id)
+            self.insert(updated)
+            return
+        self._records[file_id] = updated
+        self._notify("update", self.index_of(file_id), updated)
@@ -0,0 +1,202 @@
+"""
+RAM-backed viewing of decrypted vault files on Linux.
+
+A MemFile is the decrypted file written into a private (0700) directory
+on tmpfs, $XDG_RUNTIME_DIR or /dev/shm, so the plaintext never reaches a
+disk. It keeps its real name: the desktop picks the viewer from the
+extension, and the path still works when xdg-open hands it to another
+process (gio, D-Bus activation, an app instance that is already running).
+
+Only a directory whose mount is tmpfs or ramfs is used; without one
+RAM_DIR is None and the vault refuses to view rather than write the
+plaintext to disk.
+
+Lifetime is reference counted. ViewerTracker holds a reference per view
+until the launcher has exited, some process has been seen with the file
+open, and none has it open any more. Views that are never seen open are
+released when the vault closes. Directories left behind by a vault that
+crashed are removed the next time it starts.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+VIEWER = os.getenv("VAULT_VIEWER", "xdg-open")
+VIEW_PREFIX = "vault-view-"
+NAME_MAX = 255  # bytes in one path component
+RAM_FILESYSTEMS = {"tmpfs", "ramfs"}
+
+SUPPORTED = sys.platform.startswith("linux")
+
+
+def _filesystem_type(path):
+    """Type of the filesystem path is on, from the longest matching /proc/mounts entry."""
+    best, fstype = "", None
+    try:
+        with open("/proc/mounts") as mounts:
+            for line in mounts:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point = fields[1].replace("\\040", " ")
+                inside = path == mount_point or path.startswith(mount_point.rstrip("/") + "/")
+                if inside and len(mount_point) >= len(best):
+                    best, fstype = mount_point, fields[2]
+    except OSError:
+        return None
+    return fstype
+
+
+def _ram_dir():
+    if not SUPPORTED:
+        return None
+    for base in (os.getenv("XDG_RUNTIME_DIR"), "/dev/shm"):
+        if not base or not os.path.isdir(base) or not os.access(base, os.W_OK):
+            continue
+        base = os.path.realpath(base)
+        if _filesystem_type(base) in RAM_FILESYSTEMS:
+            return base
+    return None
+
+
+RAM_DIR = _ram_dir()  # None where no RAM-backed directory is available
+
+
+def _safe_name(filename):
+    """filename as a single path component of at most NAME_MAX bytes, keeping its extension."""
+    name = os.path.basename(filename.replace("\0", "")) or "file"
+    stem, extension = os.path.splitext(name)
+    if len(extension.encode()) > 32:
+        stem, extension = name, ""
+    while len((stem + extension).encode()) > NAME_MAX:
+        stem = stem[:-1]
+    return stem + extension
+
+
+def _open_among(paths):
+    """The subset of paths that some process of ours has open, in one pass over /proc."""
+    paths = set(paths)
+    found = set()
+    uid = os.getuid()
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            if os.stat(f"/proc/{pid}").st_uid != uid:
+                continue  # only our own processes can open files in a 0700 directory
+            fd_dir = f"/proc/{pid}/fd"
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue  # exited meanwhile
+        for fd in fds:
+            try:
+                target = os.readlink(f"{fd_dir}/{fd}")
+            except OSError:
+                continue
+            if target in paths:
+                found.add(target)
+                if found == paths:
+                    return found
+    return found
+
+
+def clean_stale_views():
+    """Remove view directories of vault processes that no longer exist."""
+    if RAM_DIR is None:
+        return
+    for entry in os.listdir(RAM_DIR):
+        if not entry.startswith(VIEW_PREFIX):
+            continue
+        pid = entry[len(VIEW_PREFIX):].split("-", 1)[0]
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            shutil.rmtree(os.path.join(RAM_DIR, entry), ignore_errors=True)
+        except PermissionError:
+            pass  # alive, owned by someone else
+
+
+class MemFile:
+    def __init__(self, filename):
+        self.dir = tempfile.mkdtemp(prefix=f"{VIEW_PREFIX}{os.getpid()}-", dir=RAM_DIR)
+        self.path = os.path.join(self.dir, _safe_name(filename))
+        self._refs = 1
+        self._lock = threading.Lock()
+
+    def writer(self):
+        """Binary file object for the plaintext, readable only by us."""
+        return os.fdopen(os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb")
+
+    def acquire(self):
+        with self._lock:
+            if self._refs == 0:
+                raise ValueError("view file already released")
+            self._refs += 1
+        return self
+
+    def release(self):
+        with self._lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def launch(self, viewer=VIEWER):
+        """Start viewer on this file; returns the Popen."""
+        return subprocess.Popen([viewer, self.path], stdin=subprocess.DEVNULL, start_new_session=True)
+
+
+class ViewerTracker:
+    """
+    Holds a MemFile reference per view and drops it once the view is over
+    (see the module docstring). reap() walks /proc, so run it off the Tk
+    thread; add() and close() may be called from any thread.
+    """
+
+    def __init__(self):
+        self._views = []  # [MemFile, Popen, seen open since the launcher exited]
+        self._lock = threading.Lock()
+
+    def add(self, mem, process):
+        with self._lock:
+            self._views.append([mem.acquire(), process, False])
+
+    def __len__(self):
+        with self._lock:
+            return len(self._views)
+
+    def reap(self):
+        """Release the files whose viewers are done; returns how many views are still held."""
+        with self._lock:
+            # The launcher may be the viewer itself; only look further once it has exited
+            waiting = [view for view in self._views if view[1].poll() is not None]
+        # xdg-open may exit before the app it handed the path to opens it
+        open_now = _open_among(view[0].path for view in waiting) if waiting else set()
+
+        with self._lock:
+            running = []
+            for view in self._views:
+                mem, _, seen = view
+                if view not in waiting:
+                    running.append(view)
+                elif mem.path in open_now:
+                    view[2] = True
+                    running.append(view)
+                elif seen:
+                    mem.release()
+                else:
+                    running.append(view)
+            self._views = running
+            return len(running)
+
+    def close(self):
+        """Drop every reference (when the vault closes), removing the plaintext."""
+        with self._lock:
+            views, self._views = self._views, []
+        for mem, _, _ in views:
+            mem.release()
@@ -1,7 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from face_registeration.face_registeration import register_face
-from db.db_manager import set_current_user
+from db.db_manager import set_current_user, add_unlock_code, get_unlock_index
+from db.unlock_index import MIN_CODE_LENGTH
+from fingerprint import matcher_service
+from fingerprint.scanner import capture_scan
 import subprocess
 import os
 import sys
@@ -96,6 +99,13 @@ def create_registration_window(parent):
         if not username or not code:
             messagebox.showerror("Error", "Please fill in all fields.")
             return
+        if len(code) < MIN_CODE_LENGTH:
+            messagebox.showerror("Error", f"Unlock code must be at least {MIN_CODE_LENGTH} characters.")
+            return
+        if code in get_unlock_index():
+            # Unlock codes are unique; the calculator finds the vault by code alone
+            messagebox.showerror("Error", "This unlock code is already taken.")
+            return
 
 
         if method == "face":
@@ -109,13 +119,17 @@ def create_registration_window(parent):
         else:
             try:
                 #  Run capture EXE
-                exe_path = os.path.abspath("../fingerprint/capture/CaptureFingerprint/x64/Debug/CaptureFingerprint.exe")
-                subprocess.run([exe_path, username], check=True)
+                scan = capture_scan(username)  # raises on a failed or empty capture
 
-                #  Run store_template.py
-                store_script = os.path.abspath("../fingerprint/store_template.py")
-                subprocess.run([sys.executable, store_script, username, code], check=True)
+                #  Store template through the matcher service, or run store_template.py
+                reply = matcher_service.request("enroll", username=username, unlock_code=code, image=scan)
+                if reply is None:
+                    store_script = os.path.abspath("../fingerprint/store_template.py")
+                    subprocess.run([sys.executable, store_script, username, code, "-"], input=scan, check=True)
+                elif not reply.get("ok"):
+                    raise RuntimeError(reply.get("error", "template could not be stored"))
 
+                add_unlock_code(code)  # stored by another process; update our index
                 messagebox.showinfo("Success", "Fingerprint registered successfully!")
                 root.destroy()
                 if parent: parent.deiconify()
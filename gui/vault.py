@@ -1,22 +1,32 @@
+import atexit
 import os
 import subprocess
 import tkinter as tk
 from tkinter import ttk, filedialog
 from PIL import Image, ImageTk
-from db.db_manager import get_files_for_user, get_current_user, set_current_user, get_current_user_id
+from db.db_manager import get_files_page, get_current_user, set_current_user, get_current_user_id, FILES_PAGE_SIZE
 import shutil
-import uuid
 import tempfile
-from cryptography.fernet import Fernet
+from gui.vault_crypto import decrypt_file, DEFAULT_WORKERS
+from gui.chunk_store import ChunkStore, ChunkBatch, is_chunked_ref
 import threading
 import time
+import webbrowser
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from db.db_manager import (
     get_current_user_id,
-    get_connection,
-    insert_file_record,
+    insert_file_records,
     delete_file_record,
+    delete_chunked_file,
+    get_file_chunks,
     get_file_record_by_id
 )
+from gui.db_async import TkDBRunner
+from gui.file_model import FileListModel
+from gui.virtual_list import VirtualList
+from gui.vault_stream import VaultReader, VaultStreamServer
+from gui.memview import MemFile, ViewerTracker, RAM_DIR, SUPPORTED as RAM_VIEWS_SUPPORTED, clean_stale_views
 
 # Colors
 BG = "#1C1C1C"  # Main background
@@ -26,6 +36,15 @@ GOLD = "#DAA520"  # Highlight color
 HOVER = "#FF4500"  # Hover color
 BORDER = "#333333"  # Border color
 
+DB_TIMEOUT = 15  # seconds before a background query is reported as failed
+IMPORT_BATCH = 200  # files rows written per transaction during an import
+PROGRESS_MS = 100  # how often the import progress bar is refreshed
+ROW_HEIGHT = 38  # pixels per file row in the list
+VIEWER_POLL_MS = 1000  # how often open views are checked so their RAM copies can be freed
+
+# Played from the loopback stream server so players can seek without a decrypted copy
+STREAMED = {'mp4', 'mov', 'avi', 'mkv', 'webm', 'mp3', 'm4a', 'aac', 'ogg', 'flac', 'wav'}
+
 def get_file_icon(filename):
     extension = filename.split('.')[-1].lower()
     icon_map = {
@@ -39,7 +58,7 @@ def get_file_icon(filename):
 
 # Global variable to track selected file
 selected_file_id = None
-checkbox_vars = {} # {file_id: tk.IntVar()}
+checkbox_vars = {} # {file_id: tk.IntVar()} for the rows currently on screen
 
 
 def animate_text(label, text):
@@ -49,29 +68,31 @@ def animate_text(label, text):
         label.after(200 * i, lambda s=text[:i]: label.config(text=s))
 
 
-def create_file_row(parent, filename, icon, file_id):
-    """Creates a single file row with selection checkbox"""
-    global selected_file_id, checkbox_vars
-
+def create_file_row(parent):
+    """Creates an empty, reusable file row with selection checkbox"""
     row = tk.Frame(parent, bg="#252525", bd=0, highlightthickness=0)
-    row.pack(fill="x", pady=1, ipady=5)
+    row.file_id = None
 
     # File icon
-    icon_label = tk.Label(row, text=icon, bg="#252525", fg=GOLD,
-                          font=("Segoe UI Emoji", 14), padx=10)
-    icon_label.pack(side="left")
+    row.icon_label = tk.Label(row, text="", bg="#252525", fg=GOLD,
+                              font=("Segoe UI Emoji", 14), padx=10)
+    row.icon_label.pack(side="left")
 
     # File name
-    name_label = tk.Label(row, text=filename, bg="#252525", fg=TEXT,
-                          font=("Consolas", 11), anchor="w")
-    name_label.pack(side="left", fill="x", expand=True, padx=5)
+    row.name_label = tk.Label(row, text="", bg="#252525", fg=TEXT,
+                              font=("Consolas", 11), anchor="w")
+    row.name_label.pack(side="left", fill="x", expand=True, padx=5)
 
     # Selection checkbox (only one file can be selected)
-    var = tk.IntVar()
-    checkbox_vars[file_id] = var  # Store the variable
+    row.var = tk.IntVar()
+
+    def on_toggle():
+        if row.file_id is not None:
+            update_selection(row.file_id)
+
     chk = tk.Checkbutton(
         row,
-        variable=var,
+        variable=row.var,
         bg="#252525",
         activebackground="#252525",
         selectcolor=BG,
@@ -80,7 +101,7 @@ def create_file_row(parent, filename, icon, file_id):
         bd=0,
         highlightthickness=0,
         padx=10,
-        command=lambda: update_selection(file_id)
+        command=on_toggle
     )
     chk.pack(side="right")
 
@@ -97,6 +118,28 @@ def create_file_row(parent, filename, icon, file_id):
     return row
 
 
+def bind_file_row(row, index, file_record):
+    """Points a recycled row at another file (None while its page is loading)"""
+    global checkbox_vars
+
+    # checkbox_vars only ever holds the variables of rows that exist
+    if checkbox_vars.get(row.file_id) is row.var:
+        del checkbox_vars[row.file_id]
+
+    if file_record is None:
+        row.file_id = None
+        row.icon_label.config(text="")
+        row.name_label.config(text="…")
+        row.var.set(0)
+        return
+
+    row.file_id = file_record['id']
+    row.icon_label.config(text=get_file_icon(file_record['filename']))
+    row.name_label.config(text=file_record['filename'])
+    row.var.set(1 if row.file_id == selected_file_id else 0)
+    checkbox_vars[row.file_id] = row.var
+
+
 # Simplify the update_selection function
 def update_selection(file_id):
     """Handles file selection (only one file at a time)"""
@@ -144,49 +187,102 @@ def create_vault_ui(root):
     # User profile header
     header = create_user_header(content, curr_user)
 
-    # File display area with scroll
+    # File display area; only the rows on screen exist as widgets
     file_container = tk.Frame(content, bg=BORDER, padx=1, pady=1)
     file_container.pack(fill="both", expand=True, padx=20, pady=(0, 20))
 
-    file_canvas = tk.Canvas(file_container, bg=BG, highlightthickness=0)
-    scrollbar = ttk.Scrollbar(file_container, orient="vertical",
-                              command=file_canvas.yview)
+    # DB calls run in the background; results come back through root.after
+    db = TkDBRunner(root)
 
-    scrollable_frame = tk.Frame(file_canvas, bg=BG)
+    # Client-side copy of the file list; the view re-binds rows from it
+    model = FileListModel()
 
-    def configure_canvas(e):
-        """Adjusts scrollable area width"""
-        file_canvas.itemconfig("frame", width=e.width - scrollbar.winfo_width())
-        file_canvas.configure(scrollregion=file_canvas.bbox("all"))
+    def make_row(parent):
+        row = create_file_row(parent)
+        file_list.bind_wheel(row)
+        for child in row.winfo_children():
+            file_list.bind_wheel(child)
+        return row
+
+    file_list = VirtualList(file_container, model, make_row, bind_file_row,
+                            row_height=ROW_HEIGHT, bg=BG,
+                            on_range=lambda first, last: prefetch_if_near_end(last))
+    file_list.pack(fill="both", expand=True)
+
+    message_label = tk.Label(file_list.viewport, text="", bg=BG)
+
+    def show_message(text, color):
+        message_label.config(text=text, fg=color)
+        message_label.place(relx=0.5, y=20, anchor="n")
+
+    def on_model_change(op, index, record):
+        global selected_file_id
+        message_label.place_forget()
+        if selected_file_id is not None and selected_file_id not in model:
+            selected_file_id = None
+            update_button_states()
+        file_list.refresh()
+
+    model.add_listener(on_model_change)
+
+    # Keyset paging state: the (date_added, id) of the last row fetched;
+    # failed is the first flag of a page that failed to load, until retried
+    paging = {"after": None, "more": True, "loading": False, "generation": 0, "failed": None}
+
+    def on_page(rows, generation, first):
+        if generation != paging["generation"]:
+            return  # a refresh started since this page was requested
+        if rows is None:
+            on_load_error("database error", generation, first)
+            return
+        paging["loading"] = False
+        paging["more"] = len(rows) == FILES_PAGE_SIZE
+        if rows:
+            paging["after"] = (rows[-1]['date_added'], rows[-1]['id'])
+        if first:
+            model.reset(rows)
+        else:
+            model.extend(rows)
+        # Keep one page ahead of the screen so scrolling never waits
+        prefetch_if_near_end(file_list.visible_range()[1])
+
+    def on_load_error(e, generation, first):
+        if generation != paging["generation"]:
+            return
+        paging["loading"] = False
+        paging["failed"] = first
+        print(f"Unexpected error loading files: {e}")
+        # Generic error display
+        show_message("Failed to load files (click to retry)", CORAL)
 
-    file_canvas.create_window((0, 0), window=scrollable_frame,
-                              anchor="nw", tags=("frame",))
-    file_canvas.bind("<Configure>", configure_canvas)
-    file_canvas.configure(yscrollcommand=scrollbar.set)
+    def retry_load(event=None):
+        if paging["failed"] is None or paging["loading"]:
+            return
+        first = paging["failed"]
+        paging["failed"] = None
+        show_message("Loading files...", GOLD)
+        fetch_page(first)
 
-    file_canvas.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
+    message_label.bind("<Button-1>", retry_load)
 
-    try:
-        files = get_files_for_user()  # Returns list of dictionaries
-        for file_record in files:
-            # Extract fields from the database record
-            filename = file_record['filename']
-            file_id = file_record['id']
+    def fetch_page(first=False):
+        paging["loading"] = True
+        generation = paging["generation"]
+        db.submit(get_files_page, paging["after"], FILES_PAGE_SIZE,
+                  on_done=lambda rows: on_page(rows, generation, first),
+                  on_error=lambda e: on_load_error(e, generation, first), timeout=DB_TIMEOUT)
 
-            # Get the appropriate icon based on filename
-            icon = get_file_icon(filename)
+    def prefetch_if_near_end(last_visible):
+        if (paging["more"] and not paging["loading"] and paging["failed"] is None
+                and last_visible >= len(model) - FILES_PAGE_SIZE):
+            fetch_page()
 
-            # Create the file row in the scrollable frame
-            create_file_row(scrollable_frame, filename, icon, file_id)
+    def refresh_files():
+        paging.update(after=None, more=True, failed=None, generation=paging["generation"] + 1)
+        show_message("Loading files...", GOLD)
+        fetch_page(first=True)
 
-    except Exception as e:
-        print(f"Unexpected error loading files: {e}")
-        # Generic error display
-        error_label = tk.Label(scrollable_frame,
-                               text="Failed to load files",
-                               fg=CORAL, bg=BG)
-        error_label.pack(pady=20)
+    refresh_files()
 
     # Control buttons
     controls = tk.Frame(content, bg=BG)
@@ -195,111 +291,296 @@ def create_vault_ui(root):
 
     # Load encryption key (already encrypted and saved securely)
     with open("secret.key", "rb") as key_file:
-        fernet = Fernet(key_file.read())
+        vault_key = key_file.read()
 
     HIDDEN_FOLDER = ".vault_hidden"
     os.makedirs(HIDDEN_FOLDER, exist_ok=True)
 
-    def encrypt_and_save_file(original_path):
+    # New files go into the deduplicating chunk store; older ones stay single blobs
+    store = ChunkStore(HIDDEN_FOLDER, vault_key)
+    reader = VaultReader(store, vault_key)
+    stream_server = VaultStreamServer(reader)
+    viewers = ViewerTracker()  # RAM-backed views that are still open
+    closed = False
+
+    def shutdown():
+        """Stop streaming and drop every plaintext view; safe to call more than once."""
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+        viewers.close()
+        stream_server.close()
+
+    def close_vault():
+        shutdown()
+        root.destroy()
+
+    # Locking, closing the window, and exiting any other way all end up here
+    root.protocol("WM_DELETE_WINDOW", close_vault)
+    root.bind("<Destroy>", lambda e: shutdown() if e.widget is root else None, add="+")
+    atexit.register(shutdown)
+    clean_stale_views()
+
+    def maintain_store():
+        """Runs in the background: learn which chunks are packed, then compact old segments."""
+        store.load_pack_index()
+        return store.compact()
+
+    def on_maintained(reclaimed):
+        if reclaimed:
+            print(f"Compacted vault packs, reclaimed {reclaimed / 1e6:.1f} MB.")
+
+    db.submit(maintain_store, on_done=on_maintained,
+              on_error=lambda e: print(f"Error compacting vault packs: {e}"))
+
+    # Shared with the Tk thread, which polls it to drive the progress bar and
+    # moves committed rows into the model as each batch lands
+    import_progress = {"active": False, "done": 0, "total": 0, "rows": deque()}
+
+    def import_files(paths):
+        """
+        Runs in the background: chunk and encrypt paths concurrently, skipping
+        chunks the store already has, and record them IMPORT_BATCH rows per
+        transaction. If a batch fails to commit its new chunks are removed
+        again. Returns (added, failed, bytes read, bytes written, seconds).
+        """
         user_id = get_current_user_id()
         if not user_id:
             raise ValueError("User not authenticated")
 
-        with open(original_path, "rb") as f:
-            original_data = f.read()
-
-        encrypted_data = fernet.encrypt(original_data)
-        random_filename = str(uuid.uuid4())  # Random name for security
-        hidden_path = os.path.join(HIDDEN_FOLDER, random_filename)
-
-        with open(hidden_path, "wb") as f:
-            f.write(encrypted_data)
-
-        # Save original name and path to DB
-        insert_file_record(
-            user_id=user_id,
-            original_name=os.path.basename(original_path),
-            hidden_path=hidden_path
-        )
+        started = time.monotonic()
+        bytes_read = bytes_written = 0
+
+        # A lone file gets every core for its chunks; otherwise files run side by side
+        chunk_workers = DEFAULT_WORKERS if len(paths) == 1 else 1
+        added = failed = 0
+        with ThreadPoolExecutor(max_workers=DEFAULT_WORKERS, thread_name_prefix="import") as pool:
+            for start in range(0, len(paths), IMPORT_BATCH):
+                batch = paths[start:start + IMPORT_BATCH]
+                # Chunks shared by files in the batch are sealed and written once
+                chunk_batch = ChunkBatch()
+                futures = [pool.submit(store.prepare_file, path, chunk_workers, chunk_batch) for path in batch]
+                prepared = []
+                for path, future in zip(batch, futures):
+                    try:
+                        prepared.append(future.result())
+                    except Exception as e:
+                        print(f"Error encrypting {path}: {e}")
+                        failed += 1
+                    import_progress["done"] += 1
+
+                if not prepared:
+                    chunk_batch.close()
+                    continue
+                rows = store.commit(prepared, lambda locations: insert_file_records(
+                    user_id,
+                    [(p.name, p.ref) for p in prepared],
+                    chunks={p.ref: p.chunks for p in prepared},
+                    locations=locations))
+                if rows is not None:
+                    import_progress["rows"].extend(rows)
+                    added += len(prepared)
+                    bytes_read += sum(p.size for p in prepared)
+                    bytes_written += sum(p.written for p in prepared)
+                else:
+                    failed += len(prepared)
+        return added, failed, bytes_read, bytes_written, time.monotonic() - started
+
+    def take_imported_rows():
+        rows = import_progress["rows"]
+        while rows:
+            model.insert(rows.popleft())
+
+    def update_import_progress():
+        if not import_progress["active"]:
+            return
+        take_imported_rows()
+        progress_bar.config(maximum=max(import_progress["total"], 1), value=import_progress["done"])
+        progress_label.config(text=f"{import_progress['done']}/{import_progress['total']}")
+        root.after(PROGRESS_MS, update_import_progress)
+
+    def finish_import(result=None):
+        import_progress["active"] = False
+        take_imported_rows()
+        progress_bar.pack_forget()
+        progress_label.pack_forget()
+        for btn in [add_btn, folder_btn]:
+            btn.config(state=tk.NORMAL)
+        if result:
+            added, failed, bytes_read, bytes_written, seconds = result
+            mb_read, mb_written = bytes_read / 1e6, bytes_written / 1e6
+            print(f"Imported {added} file(s), {failed} failed: {mb_read:.1f} MB read, "
+                  f"{mb_written:.1f} MB written, {mb_read / max(seconds, 1e-6):.1f} MB/s.")
+
+    def on_import_error(e):
+        print(f"Error adding files: {e}")
+        finish_import()
+
+    def start_import(paths):
+        if not paths or import_progress["active"]:
+            return
+        import_progress.update(active=True, done=0, total=len(paths))
+        import_progress["rows"].clear()
+        for btn in [add_btn, folder_btn]:
+            btn.config(state=tk.DISABLED)
+        progress_bar.pack(side="right", padx=10)
+        progress_label.pack(side="right")
+        update_import_progress()
+        db.submit(import_files, list(paths), on_done=finish_import, on_error=on_import_error)
 
     def add_file():
+        start_import(filedialog.askopenfilenames(parent=root))
 
+    def add_folder():
+        folder = filedialog.askdirectory(parent=root)
+        if not folder:
+            return
+        paths = []
+        for dirpath, _, filenames in os.walk(folder):
+            paths.extend(os.path.join(dirpath, name) for name in sorted(filenames))
+        start_import(paths)
 
-        root = tk.Tk()
-        root.withdraw()
-        file_path = filedialog.askopenfilename()
+    def remove_file(file_id):
+        """Runs in the background: delete the blob and its DB record."""
+        record = get_file_record_by_id(file_id)
 
-        if file_path:
-            encrypt_and_save_file(file_path)
-            print("File added successfully.")
-            for widget in scrollable_frame.winfo_children():
-                widget.destroy()
+        if not record:
+            print("File not found.")
+            return False
+
+        stream_server.forget(file_id)
+        if is_chunked_ref(record['filepath']):
+            return store.delete(lambda: delete_chunked_file(file_id)) is not None
 
-            files = get_files_for_user()  # Fetch updated files list
-            for file_record in files:
-                filename = file_record['filename']
-                file_id = file_record['id']
-                icon = get_file_icon(filename)
-                create_file_row(scrollable_frame, filename, icon, file_id)
+        if os.path.exists(record['filepath']):
+            os.remove(record['filepath'])
+        delete_file_record(file_id)
+        return True
 
     def delete_file(file_id):
+        def on_deleted(deleted):
+            if deleted:
+                print("File deleted.")
+                model.remove(file_id)
+
+        db.submit(remove_file, file_id, on_done=on_deleted,
+                  on_error=lambda e: print(f"Error deleting file: {e}"))
+
+    def decrypt_into(record, file_id, dst):
+        """Write a vault file's plaintext to dst, a path or a binary file object."""
+        if is_chunked_ref(record['filepath']):
+            chunks = get_file_chunks(file_id)
+            if not chunks:
+                print("File chunks not found.")
+                return False
+            store.read_file(chunks, dst)
+        else:
+            decrypt_file(record['filepath'], dst, vault_key)
+        return True
+
+    def decrypt_to_memory(file_id):
+        """Runs in the background: decrypt a vault file into a RAM-backed view file."""
         record = get_file_record_by_id(file_id)
-
         if not record:
             print("File not found.")
-            return
+            return None
 
+        mem = MemFile(record['filename'])
         try:
-            if os.path.exists(record['filepath']):
-                os.remove(record['filepath'])
-            delete_file_record(file_id)
-            print("File deleted.")
-            for widget in scrollable_frame.winfo_children():
-                widget.destroy()
-
-            files = get_files_for_user()  # Fetch updated files list
-            for file_record in files:
-                filename = file_record['filename']
-                file_id = file_record['id']
-                icon = get_file_icon(filename)
-                create_file_row(scrollable_frame, filename, icon, file_id)
-        except Exception as e:
-            print(f"Error deleting file: {e}")
-
-    def view_file(file_id):
+            with mem.writer() as out:
+                if decrypt_into(record, file_id, out):
+                    return mem
+        except BaseException:
+            mem.release()
+            raise
+        mem.release()
+        return None
+
+    def decrypt_to_temp(file_id):
+        """Runs in the background: decrypt a vault file into a temp dir."""
         record = get_file_record_by_id(file_id)
         if not record:
             print("File not found.")
-            return
+            return None
 
-        try:
-            with open(record['filepath'], "rb") as f:
-                encrypted_data = f.read()
+        temp_dir = tempfile.mkdtemp()
+        temp_path = os.path.join(temp_dir, record['filename'])
+        if not decrypt_into(record, file_id, temp_path):
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return None
+        return temp_dir, temp_path
 
-            decrypted_data = fernet.decrypt(encrypted_data)
+    def view_file(file_id):
+        record = model.get(file_id)
+        if record and record['filename'].rsplit('.', 1)[-1].lower() in STREAMED:
+            # The player fetches byte ranges; only the chunks it asks for get decrypted
+            webbrowser.open(stream_server.url(file_id))
+            return
+        if RAM_DIR is not None:
+            db.submit(decrypt_to_memory, file_id, on_done=open_memory_file,
+                      on_error=lambda e: print(f"Error viewing file: {e}"))
+            return
+        if RAM_VIEWS_SUPPORTED:
+            print("Error viewing file: no RAM-backed directory (tmpfs) available; "
+                  "refusing to write the plaintext to disk.")
+            return
+        db.submit(decrypt_to_temp, file_id, on_done=open_temp_file,
+                  on_error=lambda e: print(f"Error viewing file: {e}"))
 
-            temp_dir = tempfile.mkdtemp()
-            temp_path = os.path.join(temp_dir, record['filename'])
+    reaping = {"active": False}
 
-            with open(temp_path, "wb") as f:
-                f.write(decrypted_data)
+    def reap_viewers():
+        # reap() walks /proc, so keep it off the Tk thread
+        db.submit(viewers.reap, on_done=reaped,
+                  on_error=lambda e: (print(f"Error checking open views: {e}"), reaped(len(viewers))))
 
-                # Open file using default program
-                os.startfile(temp_path)
+    def reaped(held):
+        # A view added while reap() ran is counted by len(viewers)
+        if (held or viewers) and not closed:
+            root.after(VIEWER_POLL_MS, reap_viewers)
+        else:
+            reaping["active"] = False
 
-                # Run cleanup in background after delay
-                def delayed_cleanup():
-                    time.sleep(30)  # give user 30 seconds to view it
-                    try:
-                        if os.path.exists(temp_path):
-                            os.remove(temp_path)
-                        if os.path.exists(temp_dir):
-                            shutil.rmtree(temp_dir)
-                        print("Temporary file cleaned up.")
-                    except Exception as e:
-                        print(f"Error during cleanup: {e}")
+    def open_memory_file(mem):
+        if not mem:
+            return
+        try:
+            if closed:
+                return  # decrypted after the vault was locked
+            process = mem.launch()
+        except OSError as e:
+            print(f"Error viewing file: {e}")
+        else:
+            viewers.add(mem, process)
+            if not reaping["active"]:
+                reaping["active"] = True
+                root.after(VIEWER_POLL_MS, reap_viewers)
+        finally:
+            mem.release()
+
+    def open_temp_file(result):
+        if not result:
+            return
+        temp_dir, temp_path = result
 
-                threading.Thread(target=delayed_cleanup).start()
+        try:
+            # Open file using default program
+            os.startfile(temp_path)
+
+            # Run cleanup in background after delay
+            def delayed_cleanup():
+                time.sleep(30)  # give user 30 seconds to view it
+                try:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    if os.path.exists(temp_dir):
+                        shutil.rmtree(temp_dir)
+                    print("Temporary file cleaned up.")
+                except Exception as e:
+                    print(f"Error during cleanup: {e}")
+
+            threading.Thread(target=delayed_cleanup).start()
 
         except Exception as e:
             print(f"Error viewing file: {e}")
@@ -310,6 +591,11 @@ def create_vault_ui(root):
                         command=add_file)
     add_btn.pack(side="left", padx=10)
 
+    folder_btn = tk.Button(controls, text="📂 Folder", bg=BG, fg=TEXT,
+                           activebackground=HOVER, bd=0, font=("Terminal", 10),
+                           command=add_folder)
+    folder_btn.pack(side="left", padx=10)
+
     view_btn = tk.Button(controls, text="👁️ View", bg=BG, fg=TEXT,
                          activebackground=HOVER, bd=0, font=("Terminal", 10),
                          command=lambda: view_file(selected_file_id), state=tk.DISABLED)
@@ -322,11 +608,15 @@ def create_vault_ui(root):
 
     lock_btn = tk.Button(controls, text="🔐 Lock", bg=BG, fg=TEXT,
                          activebackground=HOVER, bd=0, font=("Terminal", 10),
-                         command=lambda: root.destroy())
+                         command=close_vault)
     lock_btn.pack(side="left", padx=10)
 
+    # Shown only while an import is running
+    progress_bar = ttk.Progressbar(controls, orient="horizontal", length=240, mode="determinate")
+    progress_label = tk.Label(controls, text="", bg=BG, fg=GOLD, font=("Terminal", 10))
+
     # Add hover effects to all buttons
-    for btn in [add_btn, view_btn, delete_btn, lock_btn]:
+    for btn in [add_btn, folder_btn, view_btn, delete_btn, lock_btn]:
         btn.bind("<Enter>", lambda e: e.widget.config(fg=HOVER))
         btn.bind("<Leave>", lambda e: e.widget.config(fg=TEXT))
         btn.config(highlightbackground=BORDER, highlightthickness=1)
@@ -0,0 +1,218 @@
+"""
+Streaming, chunked encryption for .vault_hidden blobs.
+
+Blob layout:
+
+    header  4s magic b"RVCK" | B version | B flags | H reserved | I chunk size | 8s nonce prefix
+    chunks  AES-256-GCM(chunk) + 16-byte tag, back to back
+
+Every chunk but the last holds exactly `chunk size` plaintext bytes. Chunk i
+uses nonce = prefix || i (uint32 BE) and authenticates header || i || last,
+so chunks cannot be reordered, dropped or truncated unnoticed. The AES key
+is derived from the vault's Fernet key with HKDF.
+
+Chunks are independent, so encrypt and decrypt spread them over a thread
+pool (AES-GCM releases the GIL) and write results back in order. At most
+2 * workers chunks are in flight, so memory stays bounded whatever the file
+size. Blobs written by the old single-token Fernet code are still readable.
+"""
+import base64
+import os
+import struct
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+MAGIC = b"RVCK"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHI8s")
+TAG_SIZE = 16
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_WORKERS = int(os.getenv("VAULT_CRYPTO_WORKERS", min(8, os.cpu_count() or 1)))
+
+
+def derive_key(fernet_key, info):
+    """Derive a 256-bit key for one purpose (named by info) from the Fernet key file contents."""
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=info,
+    ).derive(base64.urlsafe_b64decode(fernet_key))
+
+
+def derive_chunk_key(fernet_key):
+    """Derive the AES-256-GCM key for chunked blobs from the Fernet key file contents."""
+    return derive_key(fernet_key, b"RedactedVault chunked blob v1")
+
+
+def _nonce(prefix, index):
+    return prefix + struct.pack(">I", index)
+
+
+def _aad(header, index, last):
+    return header + struct.pack(">I?", index, last)
+
+
+def is_chunked_blob(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_chunks(f, size):
+    """Yield (index, data, last) for fixed-size pieces of f; one empty piece for an empty file."""
+    index = 0
+    chunk = f.read(size)
+    while True:
+        # Read one ahead so the last chunk can be flagged as such
+        following = f.read(size) if len(chunk) == size else b""
+        last = not following
+        yield index, chunk, last
+        if last:
+            return
+        chunk = following
+        index += 1
+
+
+def ordered_map(fn, items, workers):
+    """
+    Like map(fn, items) but runs up to 2 * workers calls concurrently.
+    Results come back in input order; items are only pulled as slots free up.
+    """
+    if workers <= 1:
+        for item in items:
+            yield fn(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vault-crypto") as pool:
+        in_flight = deque()
+        try:
+            for item in items:
+                in_flight.append(pool.submit(fn, item))
+                if len(in_flight) >= 2 * workers:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+def encrypt_file(src_path, dst_path, fernet_key, chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS):
+    """Encrypt src_path into a chunked blob at dst_path (written atomically)."""
+    aes = AESGCM(derive_chunk_key(fernet_key))
+    prefix = os.urandom(8)
+    header = HEADER.pack(MAGIC, VERSION, 0, 0, chunk_size, prefix)
+
+    def seal(item):
+        index, chunk, last = item
+        return aes.encrypt(_nonce(prefix, index), chunk, _aad(header, index, last))
+
+    dst_dir = os.path.dirname(os.path.abspath(dst_path))
+    fd, tmp_path = tempfile.mkstemp(dir=dst_dir, prefix=".partial-")
+    try:
+        with open(src_path, "rb") as src, os.fdopen(fd, "wb") as dst:
+            dst.write(header)
+            for sealed in ordered_map(seal, read_chunks(src, chunk_size), workers):
+                dst.write(sealed)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def iter_decrypted(src_path, fernet_key, workers=DEFAULT_WORKERS):
+    """Yield the plaintext of a vault blob chunk by chunk (legacy blobs in one piece)."""
+    with open(src_path, "rb") as src:
+        header = src.read(HEADER.size)
+        if header[:len(MAGIC)] != MAGIC:
+            # Legacy single-token Fernet blob
+            yield Fernet(fernet_key).decrypt(header + src.read())
+            return
+
+        magic, version, flags, _, chunk_size, prefix = HEADER.unpack(header)
+        if version != VERSION:
+            raise ValueError(f"unsupported vault blob version {version}")
+
+        aes = AESGCM(derive_chunk_key(fernet_key))
+
+        def open_chunk(item):
+            index, sealed, last = item
+            return aes.decrypt(_nonce(prefix, index), sealed, _aad(header, index, last))
+
+        yield from ordered_map(open_chunk, read_chunks(src, chunk_size + TAG_SIZE), workers)
+
+
+def blob_layout(src_path):
+    """
+    (chunk size, chunk count, plaintext size) of a chunked blob, from its
+    header and file size alone.
+    """
+    with open(src_path, "rb") as src:
+        header = src.read(HEADER.size)
+    magic, version, flags, _, chunk_size, prefix = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a chunked vault blob")
+    sealed_size = chunk_size + TAG_SIZE
+    body = os.path.getsize(src_path) - HEADER.size
+    count = max(1, -(-body // sealed_size))
+    return chunk_size, count, body - count * TAG_SIZE
+
+
+def read_blob_chunk(src_path, fernet_key, index):
+    """Decrypt chunk index of a chunked blob without touching the others."""
+    chunk_size, count, _ = blob_layout(src_path)
+    if not 0 <= index < count:
+        raise IndexError(f"chunk {index} out of range")
+    sealed_size = chunk_size + TAG_SIZE
+    with open(src_path, "rb") as src:
+        header = src.read(HEADER.size)
+        src.seek(HEADER.size + index * sealed_size)
+        sealed = src.read(sealed_size)
+    prefix = HEADER.unpack(header)[-1]
+    aes = AESGCM(derive_chunk_key(fernet_key))
+    return aes.decrypt(_nonce(prefix, index), sealed, _aad(header, index, index == count - 1))
+
+
+def decrypt_file(src_path, dst, fernet_key, workers=DEFAULT_WORKERS):
+    """Decrypt a vault blob into dst, a path or a writable binary file object."""
+    if isinstance(dst, (str, bytes, os.PathLike)):
+        with open(dst, "wb") as out:
+            decrypt_file(src_path, out, fernet_key, workers)
+        return
+    for plain in iter_decrypted(src_path, fernet_key, workers):
+        dst.write(plain)
+
+
+def benchmark(size_mb=256, worker_counts=(1, 2, 4, 8)):
+    """Print encrypt/decrypt throughput for a random file at several worker counts."""
+    key = Fernet.generate_key()
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "plain")
+        blob = os.path.join(tmp, "blob")
+        with open(src, "wb") as f:
+            for _ in range(size_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        print(f"{size_mb} MB, {DEFAULT_CHUNK_SIZE // 1024} KiB chunks, {os.cpu_count()} CPUs")
+        for workers in worker_counts:
+            start = time.perf_counter()
+            encrypt_file(src, blob, key, workers=workers)
+            enc = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with open(os.devnull, "wb") as sink:
+                decrypt_file(blob, sink, key, workers=workers)
+            dec = time.perf_counter() - start
+            print(f"workers={workers}: encrypt {size_mb / enc:7.1f} MB/s   decrypt {size_mb / dec:7.1f} MB/s")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,270 @@
+"""
+Random-access reads of vault files and a loopback HTTP server on top.
+
+VaultReader.read_range(file_id, offset, length) decrypts only the chunks
+that cover the range, for chunk-store files and chunked blobs alike
+(old single-token Fernet blobs have no chunks and are decrypted whole).
+Recently decrypted chunks are kept briefly, since players read
+sequentially in pieces much smaller than a chunk.
+
+VaultStreamServer serves those reads on 127.0.0.1 with Range support, so
+a media player can seek in a video without it ever being written out.
+Each file gets its own random token as its whole URL path, so a URL left
+in browser history names no file and opens nothing else, and other local
+users cannot guess it.
+"""
+import bisect
+import mimetypes
+import re
+import secrets
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography.fernet import Fernet
+
+from db.db_manager import get_file_record_by_id, get_file_chunks
+from gui.chunk_store import is_chunked_ref
+from gui.vault_crypto import blob_layout, is_chunked_blob, read_blob_chunk
+
+CHUNK_CACHE_SIZE = 8    # decrypted chunks kept for sequential readers
+STREAM_PIECE = 256 * 1024  # bytes written to the socket per read_range call
+
+
+class VaultReader:
+    def __init__(self, store, fernet_key):
+        self.store = store
+        self.fernet_key = fernet_key
+        self._files = {}             # file_id -> layout, see _describe
+        self._chunks = OrderedDict() # (file_id, index) -> plaintext, LRU
+        self._lock = threading.Lock()
+
+    def _describe(self, file_id):
+        """Filename, size and chunk offsets of a file, looked up once."""
+        with self._lock:
+            info = self._files.get(file_id)
+        if info is not None:
+            return info
+
+        record = get_file_record_by_id(file_id)
+        if not record:
+            raise FileNotFoundError(f"vault file {file_id} not found")
+        path = record['filepath']
+        info = {"filename": record['filename'], "path": path}
+        if is_chunked_ref(path):
+            chunks = get_file_chunks(file_id)
+            if not chunks:
+                raise FileNotFoundError(f"chunks of vault file {file_id} not found")
+            offsets = [0]
+            for chunk in chunks:
+                offsets.append(offsets[-1] + chunk[1])
+            info.update(kind="store", chunks=chunks, offsets=offsets, size=offsets[-1])
+        elif is_chunked_blob(path):
+            chunk_size, count, size = blob_layout(path)
+            info.update(kind="blob", offsets=[min(i * chunk_size, size) for i in range(count)] + [size], size=size)
+        else:
+            info.update(kind="fernet", offsets=[0], size=None)
+
+        with self._lock:
+            self._files[file_id] = info
+        return info
+
+    def forget(self, file_id):
+        """Drop cached layout and plaintext of a deleted file."""
+        with self._lock:
+            self._files.pop(file_id, None)
+            for key in [key for key in self._chunks if key[0] == file_id]:
+                del self._chunks[key]
+
+    def _chunk(self, file_id, info, index):
+        key = (file_id, index)
+        with self._lock:
+            plain = self._chunks.get(key)
+            if plain is not None:
+                self._chunks.move_to_end(key)
+                return plain
+
+        if info["kind"] == "store":
+            plain = self.store.read_chunk(info["chunks"][index])
+        elif info["kind"] == "blob":
+            plain = read_blob_chunk(info["path"], self.fernet_key, index)
+        else:
+            with open(info["path"], "rb") as f:
+                plain = Fernet(self.fernet_key).decrypt(f.read())
+
+        with self._lock:
+            self._chunks[key] = plain
+            while len(self._chunks) > CHUNK_CACHE_SIZE:
+                self._chunks.popitem(last=False)
+        return plain
+
+    def filename(self, file_id):
+        return self._describe(file_id)["filename"]
+
+    def file_size(self, file_id):
+        info = self._describe(file_id)
+        if info["size"] is None:
+            info["size"] = len(self._chunk(file_id, info, 0))
+        return info["size"]
+
+    def read_range(self, file_id, offset, length):
+        """Plaintext bytes [offset, offset + length) of a vault file, clipped to its size."""
+        info = self._describe(file_id)
+        end = min(offset + length, self.file_size(file_id))
+        if info["kind"] == "fernet":
+            return self._chunk(file_id, info, 0)[offset:end]
+
+        offsets = info["offsets"]
+        parts = []
+        index = bisect.bisect_right(offsets, offset) - 1
+        while offset < end:
+            start = offsets[index]
+            plain = self._chunk(file_id, info, index)
+            parts.append(plain[offset - start:end - start])
+            offset = start + len(plain)
+            index += 1
+        return b"".join(parts)
+
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header, size):
+    """(start, end inclusive) for a single-range Range header, None for the whole file, or False if unsatisfiable."""
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None  # multiple or malformed ranges: send everything
+    first, last = match.groups()
+    if first == "":
+        suffix = int(last)
+        if suffix == 0:
+            return False
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    server_version = "RedactedVault"
+
+    def log_message(self, format, *args):
+        pass  # players make a lot of requests; keep the console clean
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        # /<token>, one opaque token per file; the name stays out of browser history
+        file_id = self.server.lookup(self.path.strip("/"))
+        if file_id is None:
+            self.send_error(404)
+            return
+        reader = self.server.reader
+        try:
+            size = reader.file_size(file_id)
+            filename = reader.filename(file_id)
+            wanted = parse_range(self.headers.get("Range"), size)
+            if wanted is not False:
+                start, end = wanted if wanted else (0, size - 1)
+                # Read the first piece before committing to a status line
+                piece = reader.read_range(file_id, start, min(STREAM_PIECE, end - start + 1)) if send_body else b""
+        except FileNotFoundError:
+            self.send_error(404)
+            return
+        except Exception as e:
+            print(f"Error streaming vault file {file_id}: {e!r}")
+            self.send_error(500)
+            return
+
+        if wanted is False:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.end_headers()
+            return
+
+        self.send_response(206 if wanted else 200)
+        self.send_header("Content-Type", mimetypes.guess_type(filename)[0] or "application/octet-stream")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(max(0, end - start + 1)))
+        if wanted:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if not send_body:
+            return
+
+        offset = start
+        try:
+            while piece:
+                self.wfile.write(piece)
+                offset += len(piece)
+                if offset > end:
+                    break
+                piece = reader.read_range(file_id, offset, min(STREAM_PIECE, end - offset + 1))
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the player seeked elsewhere and dropped this request
+        except Exception as e:
+            # Headers are out; dropping the connection short of Content-Length marks it failed
+            print(f"Error streaming vault file {file_id}: {e!r}")
+            self.close_connection = True
+
+
+class VaultStreamServer:
+    """Loopback HTTP server for a VaultReader; started on first use."""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self._httpd = None
+        self._tokens = {}         # token -> file_id
+        self._file_tokens = {}    # file_id -> token
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._httpd is None:
+                httpd = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+                httpd.daemon_threads = True
+                httpd.reader = self.reader
+                httpd.lookup = self.lookup
+                threading.Thread(target=httpd.serve_forever, name="vault-stream", daemon=True).start()
+                self._httpd = httpd
+            return self._httpd
+
+    def lookup(self, token):
+        with self._lock:
+            return self._tokens.get(token)
+
+    def url(self, file_id):
+        """URL of one file; its token grants access to that file only."""
+        httpd = self.start()
+        with self._lock:
+            token = self._file_tokens.get(file_id)
+            if token is None:
+                token = secrets.token_urlsafe(24)
+                self._tokens[token] = file_id
+                self._file_tokens[file_id] = token
+        host, port = httpd.server_address[:2]
+        return f"http://{host}:{port}/{token}"
+
+    def forget(self, file_id):
+        """Revoke a deleted file's URL and drop what the reader cached for it."""
+        with self._lock:
+            self._tokens.pop(self._file_tokens.pop(file_id, None), None)
+        self.reader.forget(file_id)
+
+    def close(self):
+        with self._lock:
+            self._tokens.clear()
+            self._file_tokens.clear()
+            if self._httpd is not None:
+                self._httpd.shutdown()
+                self._httpd.server_close()
+                self._httpd = None
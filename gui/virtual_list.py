@@ -0,0 +1,182 @@
+import math
+import time
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualList(tk.Frame):
+    """
+    Scrollable list that only has widgets for the rows on screen.
+
+    source is anything with len() and [index]; an item may be None while
+    its page is still loading. make_row(parent) builds one empty row
+    widget and bind_row(row, index, item) fills it in. Rows are created
+    once for the visible area plus `overscan` on each side and then
+    re-bound to new items as the list scrolls, so the widget count stays
+    constant however long the list is. on_range(first, last) is called
+    whenever the visible index range changes, e.g. to fetch pages.
+    """
+
+    def __init__(self, parent, source, make_row, bind_row, row_height=36,
+                 overscan=4, on_range=None, bg=None, **kwargs):
+        super().__init__(parent, bg=bg, **kwargs)
+        self.source = source
+        self.make_row = make_row
+        self.bind_row = bind_row
+        self.row_height = row_height
+        self.overscan = overscan
+        self.on_range = on_range
+
+        self.viewport = tk.Frame(self, bg=bg, highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self._rows = []        # recycled row widgets
+        self._bound = {}       # row widget -> index it shows
+        self._top = 0          # scroll offset in pixels
+        self._range = None
+
+        self.viewport.bind("<Configure>", lambda e: self.refresh())
+        for widget in (self.viewport, self):
+            widget.bind("<MouseWheel>", self._on_wheel)
+            widget.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+            widget.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+
+    def bind_wheel(self, widget):
+        """Let a row's child widgets scroll the list too."""
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        widget.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+
+    def _on_wheel(self, event):
+        self.yview("scroll", -1 if event.delta > 0 else 1, "units")
+
+    def _total_height(self):
+        return len(self.source) * self.row_height
+
+    def _max_top(self):
+        return max(0, self._total_height() - self.viewport.winfo_height())
+
+    def yview(self, *args):
+        """Scrollbar protocol: ("moveto", fraction) or ("scroll", n, "units"|"pages")."""
+        if args and args[0] == "moveto":
+            self._top = float(args[1]) * self._total_height()
+        elif args and args[0] == "scroll":
+            step = self.row_height * 3 if args[2] == "units" else self.viewport.winfo_height()
+            self._top += int(args[1]) * step
+        self.refresh()
+
+    def see(self, index):
+        """Scroll just enough to make index visible."""
+        y = index * self.row_height
+        height = self.viewport.winfo_height()
+        if y < self._top:
+            self._top = y
+        elif y + self.row_height > self._top + height:
+            self._top = y + self.row_height - height
+        self.refresh()
+
+    def visible_range(self):
+        first = int(self._top // self.row_height)
+        last = int((self._top + self.viewport.winfo_height()) // self.row_height)
+        return first, min(last, len(self.source) - 1)
+
+    def refresh(self):
+        """Re-bind the rows for the current scroll position; call after the source changes."""
+        height = max(self.viewport.winfo_height(), 1)
+        self._top = min(max(self._top, 0), self._max_top())
+
+        # Grow the pool when the viewport gets taller; it never shrinks
+        needed = math.ceil(height / self.row_height) + 1 + 2 * self.overscan
+        while len(self._rows) < needed:
+            self._rows.append(self.make_row(self.viewport))
+
+        first = max(0, int(self._top // self.row_height) - self.overscan)
+        count = len(self.source)
+        for slot, row in enumerate(self._rows):
+            index = first + slot
+            if index >= count:
+                if row in self._bound:
+                    del self._bound[row]
+                    row.place_forget()
+                continue
+            item = self.source[index]
+            self.bind_row(row, index, item)
+            self._bound[row] = index
+            row.place(x=0, y=index * self.row_height - self._top,
+                      relwidth=1, height=self.row_height)
+
+        total = self._total_height()
+        if total <= height:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self._top / total, (self._top + height) / total)
+
+        visible = self.visible_range()
+        if visible != self._range:
+            self._range = visible
+            if self.on_range and count:
+                self.on_range(*visible)
+
+
+def benchmark(sizes=(1000, 10000, 100000)):
+    """Time building the vault file list at several sizes, virtualized vs one frame per row."""
+    import datetime
+    from gui.file_model import FileListModel
+
+    root = tk.Tk()
+    root.geometry("1280x720")
+    base = datetime.datetime(2026, 1, 1)
+
+    def make_row(parent):
+        row = tk.Frame(parent)
+        row.label = tk.Label(row, anchor="w")
+        row.label.pack(side="left", fill="x", expand=True)
+        row.var = tk.IntVar()
+        tk.Checkbutton(row, variable=row.var).pack(side="right")
+        return row
+
+    def bind_row(row, index, item):
+        row.label.config(text=item["filename"])
+
+    for n in sizes:
+        records = [{"id": i, "filename": f"file_{i:06d}.jpg",
+                    "date_added": base + datetime.timedelta(seconds=i)} for i in range(n)]
+
+        start = time.perf_counter()
+        model = FileListModel(records)
+        view = VirtualList(root, model, make_row, bind_row)
+        view.pack(fill="both", expand=True)
+        root.update()
+        opened = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(0, 200):
+            view.yview("moveto", i / 200)
+            root.update_idletasks()
+        scroll = (time.perf_counter() - start) / 200
+        view.destroy()
+
+        eager = None
+        if n <= 10000:
+            # The old layout: one packed frame per file
+            frame = tk.Frame(root)
+            frame.pack(fill="both", expand=True)
+            start = time.perf_counter()
+            for record in records:
+                row = make_row(frame)
+                bind_row(row, 0, record)
+                row.pack(fill="x")
+            root.update()
+            eager = time.perf_counter() - start
+            frame.destroy()
+
+        eager_text = f"{eager * 1000:9.1f} ms" if eager is not None else "  skipped"
+        print(f"{n:>7} files: virtual open {opened * 1000:7.1f} ms, "
+              f"scroll {scroll * 1000:5.2f} ms/step, per-row frames {eager_text}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,77 @@
+"""
+Device-free check of the in-memory fingerprint pipeline.
+
+Renders synthetic ridge patterns at the scanner resolution and pushes them
+through the same functions the login and enrollment paths use, so the
+matcher runs without the SecuGen reader or a database. Run from the repo
+root: python -m pytest
+"""
+import importlib.util
+import os
+import sys
+
+import numpy as np
+import pytest
+
+FINGERPRINT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fingerprint")
+sys.path.insert(0, FINGERPRINT_DIR)  # the fingerprint scripts import their siblings by bare name
+
+from match_utils import IMG_WIDTH, IMG_HEIGHT, load_fingerprint_image, minutiae_from_image  # noqa: E402
+
+
+def _load_matcher():
+    """Import 'match template.py', whose file name is not a valid module name."""
+    spec = importlib.util.spec_from_file_location(
+        "match_template", os.path.join(FINGERPRINT_DIR, "match template.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+matcher = _load_matcher()
+
+
+def synthetic_fingerprint(seed, noise=0.0, noise_seed=None):
+    """Render a whorl-like ridge pattern as raw 8-bit scanner bytes."""
+    rng = np.random.default_rng(seed)
+    cx, cy = rng.uniform(0.35, 0.65, 2) * (IMG_WIDTH, IMG_HEIGHT)
+    twist = rng.uniform(1.0, 4.0)
+    y, x = np.mgrid[0:IMG_HEIGHT, 0:IMG_WIDTH].astype(np.float64)
+    r = np.hypot(x - cx, y - cy)
+    theta = np.arctan2(y - cy, x - cx)
+    img = 128 + 100 * np.sin(0.55 * r + twist * theta + rng.uniform(0, 2 * np.pi))
+    if noise:
+        img += np.random.default_rng(noise_seed).normal(0, noise, img.shape)
+    return np.clip(img, 0, 255).astype(np.uint8).tobytes()
+
+
+@pytest.fixture(scope="module")
+def enrolled():
+    return minutiae_from_image(synthetic_fingerprint(1))
+
+
+def test_bytes_memoryview_and_array_agree():
+    raw = synthetic_fingerprint(1)
+    as_array = np.frombuffer(raw, dtype=np.uint8).reshape(IMG_HEIGHT, IMG_WIDTH)
+    assert np.array_equal(minutiae_from_image(raw), minutiae_from_image(memoryview(raw)))
+    assert np.array_equal(minutiae_from_image(raw), minutiae_from_image(as_array))
+
+
+def test_wrong_sized_scan_is_rejected():
+    with pytest.raises(ValueError):
+        load_fingerprint_image(synthetic_fingerprint(1)[:-1])
+
+
+def test_enough_minutiae_are_extracted(enrolled):
+    assert len(enrolled) >= matcher.MIN_MINUTIAE
+
+
+def test_genuine_scan_passes_the_threshold(enrolled):
+    ratio = matcher.match_scan(synthetic_fingerprint(1, noise=8, noise_seed=7), enrolled)
+    assert ratio is not None and ratio > matcher.MATCH_THRESHOLD
+
+
+@pytest.mark.parametrize("seed", [2, 3, 4])
+def test_impostor_scan_stays_below_the_threshold(enrolled, seed):
+    ratio = matcher.match_scan(synthetic_fingerprint(seed), enrolled)
+    assert ratio is None or ratio < matcher.MATCH_THRESHOLD
@@ -0,0 +1,80 @@
+"""
+EXPLAIN the real login and vault-open queries and fail if any of them
+scans a table or sorts. They run against a throwaway schema created with
+the server credentials from .env, migrated to the latest version, seeded
+with enough rows that the optimizer prefers indexes as it does on a real
+vault, and dropped afterwards; the database named in .env is never
+touched. Skipped when no server is reachable. Run from the repo root:
+python -m pytest
+"""
+import os
+import secrets
+from contextlib import closing
+
+import mysql.connector
+import pytest
+from dotenv import load_dotenv
+
+from db.db_manager import DB_ERRORS
+from db.schema import HOT_QUERIES, LATEST_VERSION, explain_problems, migrate
+
+USERS = 200
+FILES_PER_USER = 50
+
+
+def _seed(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.executemany("INSERT INTO users (username) VALUES (%s)",
+                           [(f"agent{i}",) for i in range(USERS)])
+        cursor.execute("SELECT id FROM users")
+        user_ids = [row[0] for row in cursor.fetchall()]
+        cursor.executemany("INSERT INTO vault_settings (user_id, unlock_code) VALUES (%s, %s)",
+                           [(user_id, f"{user_id:06d}+1=") for user_id in user_ids])
+        cursor.executemany("INSERT INTO biometric_data (user_id, type, data) VALUES (%s, %s, %s)",
+                           [(user_id, kind, b"template") for user_id in user_ids for kind in ("face", "finger")])
+        cursor.executemany(
+            "INSERT INTO files (user_id, filename, filepath, date_added) VALUES (%s, %s, %s, %s)",
+            [(user_id, f"file{n}.txt", f".vault_hidden/{user_id}-{n}",
+              f"2025-01-{n % 28 + 1:02d} {n % 24:02d}:00:00")
+             for user_id in user_ids for n in range(FILES_PER_USER)])
+        conn.commit()
+        for table in ("users", "vault_settings", "biometric_data", "files"):
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+@pytest.fixture(scope="module")
+def cursor():
+    load_dotenv()
+    try:
+        conn = mysql.connector.connect(host=os.getenv("DB_HOST"),
+                                       user=os.getenv("DB_USER"),
+                                       password=os.getenv("DB_PASSWORD"))
+    except (DB_ERRORS + (OSError, ValueError)) as e:
+        pytest.skip(f"no database server available: {e}")
+
+    schema = f"redactedvault_plans_{secrets.token_hex(4)}"
+    with closing(conn):
+        setup = conn.cursor()
+        try:
+            setup.execute(f"CREATE DATABASE {schema}")
+        except DB_ERRORS as e:
+            setup.close()
+            pytest.skip(f"cannot create a scratch schema: {e}")
+        try:
+            setup.execute(f"USE {schema}")
+            assert migrate(conn) == LATEST_VERSION
+            _seed(conn)
+            with closing(conn.cursor(dictionary=True)) as cursor:
+                yield cursor
+        finally:
+            setup.execute(f"DROP DATABASE {schema}")
+            setup.close()
+
+
+@pytest.mark.parametrize("name, sql, params", HOT_QUERIES, ids=[name for name, _, _ in HOT_QUERIES])
+def test_hot_query_uses_an_index(cursor, name, sql, params):
+    assert explain_problems(cursor, sql, params) == []